@@ -1,8 +1,21 @@
 import discord
 from discord.ext import commands
+import argparse
 import asyncio
+import hashlib
+import json
+from typing import List, Optional
 
-from config import BOT_TOKEN, BOT_STATUS
+from config import BOT_TOKEN, BOT_STATUS, COMMAND_SYNC_CONCURRENCY, MEMBER_CLEANUP_CONCURRENCY, SHARD_COUNT
+from utils.permissions import PermissionResolver
+from utils.jobs import JobQueue
+from utils.channel_pool import ChannelPool
+from utils.admission import SubmissionGate
+from utils.log_dispatcher import LogDispatcher
+from utils.direct_messages import DirectMessageService
+from utils.rest import RestScheduler
+from utils.interactions import InteractionMonitor
+from utils.archive import ApplicationArchiver
 
 # Intents
 intents = discord.Intents.default()
@@ -11,15 +24,41 @@ intents.members = True
 intents.guilds = True
 
 
-class ApplicationBot(commands.Bot):
-    """Основной класс бота."""
+class ApplicationBot(commands.AutoShardedBot):
+    """Основной класс бота.
 
-    def __init__(self):
+    Args:
+        force_sync: Синхронизировать команды без проверки хэша
+        shard_ids: Шарды, которыми управляет этот процесс (None - все)
+        shard_count: Общее число шардов (None - рекомендованное Discord)
+        cluster_id: Номер кластера при запуске через launcher.py
+    """
+
+    def __init__(
+        self,
+        force_sync: bool = False,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None,
+        cluster_id: Optional[int] = None
+    ):
         super().__init__(
             command_prefix="!",
             intents=intents,
-            help_command=None
+            help_command=None,
+            shard_ids=shard_ids,
+            shard_count=shard_count
         )
+        self.rest = RestScheduler()
+        self.interactions = InteractionMonitor()
+        self.permissions = PermissionResolver()
+        self.jobs = JobQueue(self)
+        self.channel_pool = ChannelPool(self)
+        self.admission = SubmissionGate()
+        self.logs = LogDispatcher(self)
+        self.dm = DirectMessageService(self)
+        self.archive = ApplicationArchiver(self)
+        self.force_sync = force_sync
+        self.cluster_id = cluster_id
 
     async def setup_hook(self):
         """Загрузка cogs и синхронизация команд."""
@@ -33,27 +72,57 @@ class ApplicationBot(commands.Bot):
                 print(f"[-] Ошибка загрузки {cog}: {e}")
 
         # Регистрируем persistent views
-        from views.moderation_buttons import ApplicationPanelView, ModerationView
+        from views.moderation_buttons import ApplicationPanelView, ModerationButton, LegacyModerationButton
         from views.welcome_view import WelcomeView
 
         self.add_view(ApplicationPanelView(self))
         self.add_view(WelcomeView(self))
 
-        # Для ModerationView нужно восстановить все активные заявки
-        from database import get_connection
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id FROM applications
-            WHERE status IN ('pending', 'reviewing')
-        """)
-        rows = cursor.fetchall()
-        conn.close()
+        # Кнопки модерации всех заявок обслуживаются одним динамическим обработчиком
+        self.add_dynamic_items(ModerationButton, LegacyModerationButton)
+
+        # Индекс пользователей с ветками участника для быстрого on_member_remove
+        from database import db
+        owners = await db.load_member_thread_owners()
+        print(f"[+] Загружен индекс веток участников: {owners}")
+
+        # Фоновые задачи после решений по заявкам
+        from utils.application_jobs import register_application_jobs
+        register_application_jobs(self.jobs)
+        self.jobs.start()
+
+        # Пул заранее созданных каналов заявок
+        self.channel_pool.start()
+
+        # Пакетная отправка логов и личных сообщений
+        self.logs.start()
+        self.dm.start()
+
+        # Перенос старых решенных заявок в архив
+        self.archive.start()
 
-        for row in rows:
-            self.add_view(ModerationView(self, row['id']))
+        # Сверка заявок с каналами, удаленными пока бот был выключен
+        self._reconcile_task = asyncio.create_task(self.reconcile())
 
-        print(f"[+] Восстановлено {len(rows)} активных заявок")
+    async def close(self):
+        """Остановка бота: сначала останавливаем фоновые задачи и отправляем накопленные логи."""
+        await self.jobs.close()
+        await self.channel_pool.close()
+        await self.logs.close()
+        await self.dm.close()
+        await self.archive.close()
+
+        await super().close()
+
+    async def reconcile(self):
+        """Однократная сверка заявок после загрузки гильдий."""
+        from utils.reconciliation import reconcile_applications
+
+        await self.wait_until_ready()
+        try:
+            await reconcile_applications(self)
+        except Exception as e:
+            print(f"[-] Ошибка сверки заявок: {e}")
 
     async def on_ready(self):
         """Событие при готовности бота."""
@@ -61,6 +130,9 @@ class ApplicationBot(commands.Bot):
         print(f"Бот запущен: {self.user.name}")
         print(f"ID: {self.user.id}")
         print(f"Серверов: {len(self.guilds)}")
+        print(f"Шарды: {sorted(self.shards)} из {self.shard_count}")
+        if self.cluster_id is not None:
+            print(f"Кластер: {self.cluster_id}")
         print(f"{'='*50}")
 
         # Устанавливаем статус
@@ -70,51 +142,169 @@ class ApplicationBot(commands.Bot):
         )
         await self.change_presence(activity=activity)
 
-        # Синхронизируем команды для каждого сервера
-        for guild in self.guilds:
-            try:
-                self.tree.copy_global_to(guild=guild)
-                synced = await self.tree.sync(guild=guild)
-                print(f"[+] Синхронизировано {len(synced)} команд для сервера {guild.name}")
-            except Exception as e:
-                print(f"[-] Ошибка синхронизации для {guild.name}: {e}")
+        # Синхронизируем команды только там, где они изменились
+        await self.sync_commands(self.guilds)
+
+    async def on_guild_join(self, guild: discord.Guild):
+        """Событие при добавлении бота на сервер."""
+        await self.sync_commands([guild])
+
+    def command_hash(self, guild: discord.Guild) -> str:
+        """Считает стабильный хэш дерева команд гильдии."""
+        commands_data = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)),
+            key=lambda data: (data.get('type', 1), data['name'])
+        )
+        payload = json.dumps(commands_data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def sync_commands(self, guilds):
+        """Синхронизирует команды гильдий, у которых изменился хэш дерева команд.
+
+        Последний синхронизированный хэш хранится в базе, поэтому переподключения
+        и перезапуски без изменений команд не тратят REST-запросы.
+        """
+        from database import db
+
+        stored_hashes = await db.get_command_hashes()
+        semaphore = asyncio.Semaphore(COMMAND_SYNC_CONCURRENCY)
+        synced_count = 0
+        skipped_count = 0
+        failed_count = 0
+
+        async def sync_guild(guild: discord.Guild):
+            nonlocal synced_count, skipped_count, failed_count
+
+            self.tree.copy_global_to(guild=guild)
+            command_hash = self.command_hash(guild)
+            if not self.force_sync and stored_hashes.get(guild.id) == command_hash:
+                skipped_count += 1
+                return
+
+            async with semaphore:
+                try:
+                    synced = await self.rest.background(self.tree.sync, guild=guild)
+                    await db.save_command_hash(guild.id, command_hash)
+                    synced_count += 1
+                    print(f"[+] Синхронизировано {len(synced)} команд для сервера {guild.name}")
+                except Exception as e:
+                    failed_count += 1
+                    print(f"[-] Ошибка синхронизации для {guild.name}: {e}")
+
+        await asyncio.gather(*(sync_guild(guild) for guild in guilds))
+
+        print(
+            f"[+] Синхронизация команд: обновлено {synced_count}, "
+            f"пропущено без изменений {skipped_count}, ошибок {failed_count}"
+        )
+
+    async def on_member_join(self, member: discord.Member):
+        """Событие при входе пользователя - он может быть модератором."""
+        self.permissions.invalidate_member(member.guild.id, member.id)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """Событие при изменении участника - сбрасываем кэш прав при смене ролей."""
+        if before.roles != after.roles:
+            self.permissions.invalidate_member(after.guild.id, after.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        """Событие при изменении роли."""
+        self.permissions.invalidate_roles(after.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        """Событие при удалении роли."""
+        self.permissions.invalidate_roles(role.guild.id)
+
+    async def on_guild_settings_update(self, guild_id: int):
+        """Событие после изменения настроек гильдии командами."""
+        self.permissions.invalidate_guild(guild_id)
+        self.channel_pool.request_refill(guild_id)
 
     async def on_member_remove(self, member: discord.Member):
         """Событие при выходе пользователя с сервера - удаляем его ветки."""
-        from database import get_user_member_threads, update_application
+        self.permissions.invalidate_member(member.guild.id, member.id)
+
+        from database import db, member_thread_owners
+
+        # Быстрый путь: у большинства уходящих веток участника нет
+        if not member_thread_owners.might_own(member.guild.id, member.id):
+            return
 
         # Получаем все ветки участника
-        threads = get_user_member_threads(member.guild.id, member.id)
+        threads = await db.get_user_member_threads(member.guild.id, member.id)
+
+        semaphore = asyncio.Semaphore(MEMBER_CLEANUP_CONCURRENCY)
 
-        for thread_data in threads:
-            thread_id = thread_data.get('member_thread_id')
-            if thread_id:
+        async def delete_thread(thread_data) -> Optional[int]:
+            """Удаляет ветку, возвращает ID заявки, если ветки больше нет."""
+            thread_id = thread_data.member_thread_id
+            if not thread_id:
+                return None
+
+            async with semaphore:
                 try:
                     thread = member.guild.get_thread(thread_id)
                     if not thread:
-                        try:
-                            thread = await member.guild.fetch_channel(thread_id)
-                        except:
-                            continue
-
-                    if thread:
-                        await thread.delete()
-                        print(f"[+] Удалена ветка {thread.name} для пользователя {member.name}")
-                        update_application(thread_data['id'], member_thread_id=None)
+                        thread = await self.rest.background(member.guild.fetch_channel, thread_id)
+
+                    await self.rest.background(thread.delete)
+                    print(f"[+] Удалена ветка {thread.name} для пользователя {member.name}")
+                    return thread_data.id
+                except discord.NotFound:
+                    return thread_data.id
                 except Exception as e:
                     print(f"[-] Ошибка удаления ветки: {e}")
+                    return None
 
+        results = await asyncio.gather(*(delete_thread(thread_data) for thread_data in threads))
+        cleared = [application_id for application_id in results if application_id is not None]
 
-async def main():
-    """Запуск бота."""
-    from database import init_database
-    init_database()
+        # Одно обновление базы на все удаленные ветки
+        await db.clear_member_threads(cleared)
+        if len(cleared) == len(threads):
+            member_thread_owners.discard(member.guild.id, member.id)
+
+
+def parse_args():
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(description="Бот заявок в клан")
+    parser.add_argument(
+        "--force-sync",
+        action="store_true",
+        help="синхронизировать команды во всех гильдиях, даже если они не менялись"
+    )
+    return parser.parse_args()
+
+
+async def run_bot(
+    force_sync: bool = False,
+    shard_ids: Optional[List[int]] = None,
+    shard_count: Optional[int] = None,
+    cluster_id: Optional[int] = None
+):
+    """Запускает бота с заданным набором шардов."""
+    from database import db
+    await db.init_database()
     print("[+] База данных инициализирована")
 
-    bot = ApplicationBot()
+    bot = ApplicationBot(
+        force_sync=force_sync,
+        shard_ids=shard_ids,
+        shard_count=shard_count,
+        cluster_id=cluster_id
+    )
+
+    try:
+        async with bot:
+            await bot.start(BOT_TOKEN)
+    finally:
+        db.close()
 
-    async with bot:
-        await bot.start(BOT_TOKEN)
+
+async def main():
+    """Запуск бота в одном процессе."""
+    args = parse_args()
+    await run_bot(force_sync=args.force_sync, shard_count=SHARD_COUNT)
 
 
 if __name__ == "__main__":
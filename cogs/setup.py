@@ -3,6 +3,8 @@ from discord import app_commands
 from discord.ext import commands
 from typing import Optional
 
+from config import CHANNEL_POOL_MAX_SIZE
+
 
 class SetupCog(commands.Cog):
     """Команды настройки бота."""
@@ -23,15 +25,16 @@ class SetupCog(commands.Cog):
         фото: Optional[str] = None
     ):
         """Создает панель получения роли."""
-        from database import save_guild_settings
+        from database import db
         from views.welcome_view import WelcomeView
 
         # Сохраняем настройки
-        save_guild_settings(
+        await db.save_guild_settings(
             interaction.guild_id,
             welcome_role_id=роль.id,
             welcome_image_url=фото
         )
+        self.bot.dispatch('guild_settings_update', interaction.guild_id)
 
         # Отправляем панель
         view = WelcomeView(self.bot)
@@ -54,8 +57,15 @@ class SetupCog(commands.Cog):
         фото="Ссылка на изображение",
         роль="Роль, которую получит принятый участник",
         категория="Категория для создания каналов заявок",
-        ветка="Канал для создания веток принятых участников"
+        ветка="Канал для создания веток принятых участников",
+        режим="Где создавать заявки: отдельный канал или приватная ветка",
+        канал_заявок="Канал, в котором создаются ветки заявок (режим веток)",
+        пул="Сколько скрытых каналов заявок держать наготове (0 - выключено)"
     )
+    @app_commands.choices(режим=[
+        app_commands.Choice(name="Канал на каждую заявку", value="channel"),
+        app_commands.Choice(name="Приватная ветка в канале заявок", value="thread"),
+    ])
     async def zayava(
         self,
         interaction: discord.Interaction,
@@ -64,12 +74,26 @@ class SetupCog(commands.Cog):
         фото: Optional[str] = None,
         роль: Optional[discord.Role] = None,
         категория: Optional[discord.CategoryChannel] = None,
-        ветка: Optional[discord.TextChannel] = None
+        ветка: Optional[discord.TextChannel] = None,
+        режим: Optional[app_commands.Choice[str]] = None,
+        канал_заявок: Optional[discord.TextChannel] = None,
+        пул: Optional[app_commands.Range[int, 0, CHANNEL_POOL_MAX_SIZE]] = None
     ):
         """Настройка и размещение панели заявок."""
-        from database import save_guild_settings
+        from database import db
         from views.moderation_buttons import ApplicationPanelView
 
+        # В режиме веток заявкам нужен канал, в котором создаются ветки
+        current = await db.get_guild_settings(interaction.guild_id)
+        mode = режим.value if режим else (current.application_mode if current else 'channel')
+        review_channel_id = канал_заявок.id if канал_заявок else (current.review_channel_id if current else None)
+        if mode == 'thread' and not review_channel_id:
+            await interaction.response.send_message(
+                "Для режима веток укажите **канал_заявок** - в нем будут создаваться ветки заявок.",
+                ephemeral=True
+            )
+            return
+
         # Сохраняем настройки
         updates = {}
 
@@ -86,9 +110,16 @@ class SetupCog(commands.Cog):
             updates['applications_category_id'] = категория.id
         if ветка:
             updates['branch_channel_id'] = ветка.id
+        if режим:
+            updates['application_mode'] = режим.value
+        if канал_заявок:
+            updates['review_channel_id'] = канал_заявок.id
+        if пул is not None:
+            updates['channel_pool_size'] = пул
 
         if updates:
-            save_guild_settings(interaction.guild_id, **updates)
+            await db.save_guild_settings(interaction.guild_id, **updates)
+            self.bot.dispatch('guild_settings_update', interaction.guild_id)
 
         # Формируем панель
         final_name = название or "Клан"
@@ -147,7 +178,7 @@ class SetupCog(commands.Cog):
         юзер5: Optional[discord.Member] = None
     ):
         """Устанавливает модераторов заявок."""
-        from database import save_guild_settings
+        from database import db
 
         roles = [r for r in [роль1, роль2, роль3, роль4, роль5] if r is not None]
         users = [u for u in [юзер1, юзер2, юзер3, юзер4, юзер5] if u is not None]
@@ -155,11 +186,8 @@ class SetupCog(commands.Cog):
         role_ids = [r.id for r in roles]
         user_ids = [u.id for u in users]
 
-        save_guild_settings(
-            interaction.guild_id,
-            moderator_roles=role_ids,
-            moderator_users=user_ids
-        )
+        await db.set_guild_moderators(interaction.guild_id, role_ids, user_ids)
+        self.bot.dispatch('guild_settings_update', interaction.guild_id)
 
         response_parts = []
         if roles:
@@ -174,6 +202,67 @@ class SetupCog(commands.Cog):
 
         await interaction.response.send_message(response, ephemeral=True)
 
+    @app_commands.command(name="moderator_add", description="Добавить модератора заявок")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(
+        роль="Роль модератора",
+        юзер="Пользователь-модератор"
+    )
+    async def moderator_add(
+        self,
+        interaction: discord.Interaction,
+        роль: Optional[discord.Role] = None,
+        юзер: Optional[discord.Member] = None
+    ):
+        """Добавляет роль или пользователя к модераторам, не трогая остальных."""
+        await self.change_moderator(interaction, роль, юзер, add=True)
+
+    @app_commands.command(name="moderator_remove", description="Убрать модератора заявок")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(
+        роль="Роль модератора",
+        юзер="Пользователь-модератор"
+    )
+    async def moderator_remove(
+        self,
+        interaction: discord.Interaction,
+        роль: Optional[discord.Role] = None,
+        юзер: Optional[discord.Member] = None
+    ):
+        """Убирает роль или пользователя из модераторов."""
+        await self.change_moderator(interaction, роль, юзер, add=False)
+
+    async def change_moderator(
+        self,
+        interaction: discord.Interaction,
+        роль: Optional[discord.Role],
+        юзер: Optional[discord.Member],
+        add: bool
+    ):
+        """Добавляет или убирает по одной строке guild_moderators для каждого указанного модератора."""
+        from database import db
+
+        targets = [('role', роль), ('user', юзер)]
+        targets = [(kind, target) for kind, target in targets if target is not None]
+        if not targets:
+            await interaction.response.send_message("Укажите роль или пользователя.", ephemeral=True)
+            return
+
+        change = db.add_guild_moderator if add else db.remove_guild_moderator
+        changed = []
+        for kind, target in targets:
+            if await change(interaction.guild_id, kind, target.id):
+                changed.append(target.mention)
+
+        if changed:
+            self.bot.dispatch('guild_settings_update', interaction.guild_id)
+            action = "добавлены в модераторы" if add else "убраны из модераторов"
+            response = f"{', '.join(changed)} {action}."
+        else:
+            response = "Список модераторов не изменился."
+
+        await interaction.response.send_message(response, ephemeral=True)
+
     @app_commands.command(name="logs", description="Установить канал для логов заявок")
     @app_commands.default_permissions(administrator=True)
     @app_commands.describe(
@@ -185,12 +274,13 @@ class SetupCog(commands.Cog):
         канал: discord.TextChannel
     ):
         """Устанавливает канал для логов заявок."""
-        from database import save_guild_settings
+        from database import db
 
-        save_guild_settings(
+        await db.save_guild_settings(
             interaction.guild_id,
             logs_channel_id=канал.id
         )
+        self.bot.dispatch('guild_settings_update', interaction.guild_id)
 
         embed = discord.Embed(
             title="Канал логов установлен",
@@ -200,6 +290,111 @@ class SetupCog(commands.Cog):
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(name="archive", description="Размер архива заявок и сжатие базы")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(
+        сжать="Перенести старые заявки в архив и сжать файлы базы (VACUUM)"
+    )
+    async def archive(
+        self,
+        interaction: discord.Interaction,
+        сжать: bool = False
+    ):
+        """Показывает размер рабочей базы и архива, по запросу сжимает их."""
+        from database import db
+
+        # База общая для всех серверов бота, поэтому команда только для владельца
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                "Команда доступна только владельцу бота.",
+                ephemeral=True
+            )
+            return
+
+        # VACUUM переписывает файлы целиком и может занять больше 3 секунд
+        await interaction.response.defer(ephemeral=True)
+
+        embed = discord.Embed(title="Архив заявок", color=0x00FF00)
+
+        if сжать:
+            archived = await self.bot.archive.archive()
+            reclaimed = await db.compact_databases()
+            embed.add_field(name="Перенесено в архив", value=str(archived), inline=True)
+            embed.add_field(name="Освобождено", value=_format_size(reclaimed), inline=True)
+
+        stats = await db.get_archive_stats()
+        embed.add_field(name="Рабочих заявок", value=str(stats.hot_applications), inline=False)
+        embed.add_field(name="Заявок в архиве", value=str(stats.archived_applications), inline=False)
+        embed.add_field(name="Рабочая база", value=_format_size(stats.database_bytes), inline=True)
+        embed.add_field(name="Архив", value=_format_size(stats.archive_bytes), inline=True)
+        embed.add_field(name="Свободно (вернет сжатие)", value=_format_size(stats.free_bytes), inline=True)
+
+        retention = self.bot.archive.retention_days
+        embed.set_footer(
+            text=f"Срок хранения решенных заявок: {retention} дн." if retention > 0 else "Архивация отключена"
+        )
+
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="botstats", description="Задержки ответов и нагрузка бота")
+    @app_commands.default_permissions(administrator=True)
+    async def botstats(self, interaction: discord.Interaction):
+        """Показывает время ответа на взаимодействия, очереди REST-запросов и кэш настроек."""
+        # Статистика процесса по всем серверам, поэтому команда только для владельца
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                "Команда доступна только владельцу бота.",
+                ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(title="Статистика бота", color=0x00FF00)
+
+        # Время от получения взаимодействия до первого ответа
+        for name, handler in sorted(self.bot.interactions.stats().items()):
+            histogram = " ".join(f"`{label}` {count}" for label, count in handler['histogram'].items())
+            embed.add_field(
+                name=f"{name} ({handler['count']})",
+                value=(
+                    f"{histogram}\n"
+                    f"Почти опоздали: {handler['near_misses']}, авто-defer: {handler['auto_defers']}"
+                ),
+                inline=False
+            )
+        if not embed.fields:
+            embed.description = "Взаимодействий пока не было."
+
+        # Очереди REST-запросов по классам приоритета
+        rest_lines = [
+            f"`{name}`: в очереди {queue['queued']}, выполняется {queue['active']}, всего {queue['total']}, "
+            f"ожидание сред. {queue['avg_wait_ms']:.0f} мс / макс. {queue['max_wait_ms']:.0f} мс"
+            for name, queue in self.bot.rest.stats().items()
+        ]
+        embed.add_field(name="REST-запросы", value="\n".join(rest_lines) or "Нет данных", inline=False)
+
+        # Кэш настроек гильдий
+        from database import settings_cache
+
+        cache = settings_cache.stats()
+        lookups = cache['hits'] + cache['misses']
+        hit_rate = cache['hits'] / lookups * 100 if lookups else 0.0
+        embed.add_field(
+            name="Кэш настроек",
+            value=f"Попаданий {cache['hits']}, промахов {cache['misses']} ({hit_rate:.1f}%), гильдий в кэше {cache['size']}",
+            inline=False
+        )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+def _format_size(size: int) -> str:
+    """Размер в байтах в читаемом виде."""
+    for unit in ("Б", "КБ", "МБ"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
 
 async def setup(bot):
     await bot.add_cog(SetupCog(bot))
@@ -8,7 +8,76 @@ BOT_TOKEN = os.getenv("DISCORD_TOKEN", "YOUR_BOT_TOKEN_HERE")
 
 # Database
 DATABASE_PATH = "data/bot_database.db"
+ARCHIVE_DATABASE_PATH = "data/bot_archive.db"  # решенные заявки старше срока хранения
 
 # Bot Settings
 BOT_PREFIX = "!"
 BOT_STATUS = "Заявки в клан"
+
+# Сколько гильдий синхронизировать с Discord одновременно
+COMMAND_SYNC_CONCURRENCY = 5
+
+# Sharding: общее число шардов (пусто - рекомендованное Discord) и число процессов-кластеров
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", "1"))
+CLUSTER_LOGS_DIR = "logs"
+
+# Database connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+DB_BUSY_TIMEOUT = 5.0  # секунд ожидания блокировки записи
+DB_CACHE_SIZE_KB = 16384
+DB_MMAP_SIZE = 64 * 1024 * 1024
+DB_CACHED_STATEMENTS = 256
+
+# Background job queue
+JOB_WORKERS = 4
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_DELAY = 5.0  # секунд, удваивается с каждой попыткой
+JOB_RETRY_MAX_DELAY = 600.0
+JOB_POLL_INTERVAL = 5.0
+
+# Сколько участников добавлять в ветку одновременно
+THREAD_FANOUT_CONCURRENCY = 5
+
+# Сколько веток удалять одновременно при выходе участника
+MEMBER_CLEANUP_CONCURRENCY = 5
+
+# Пул заранее созданных каналов заявок
+CHANNEL_POOL_MAX_SIZE = 10
+CHANNEL_POOL_NAME = "резерв-заявки"
+
+# Ограничение частоты подачи заявок (token bucket: емкость, секунд на восстановление одного токена)
+SUBMIT_USER_BUCKET = (2, 300.0)
+SUBMIT_GUILD_BUCKET = (20, 6.0)
+SUBMIT_MAX_CONCURRENT = 10  # одновременных обработок заявок на процесс
+ACTIVE_APPLICATION_CACHE_TTL = 300.0
+UNPUBLISHED_APPLICATION_TIMEOUT = 10  # минут, после которых заявка без канала считается несозданной
+
+# Пакетная отправка логов
+LOG_FLUSH_INTERVAL = 2.0  # секунд
+LOG_BATCH_SIZE = 10  # максимум embed в одном сообщении Discord
+LOG_BUFFER_LIMIT = 100  # на гильдию, при переполнении старые записи отбрасываются
+LOG_USE_WEBHOOKS = os.getenv("LOG_USE_WEBHOOKS", "1") == "1"
+LOG_WEBHOOK_NAME = "Логи заявок"
+
+# Личные сообщения заявителям
+DM_WORKERS = 2
+DM_COALESCE_DELAY = 1.0  # секунд ожидания перед отправкой, чтобы объединить события
+DM_MAX_ATTEMPTS = 3
+DM_RETRY_DELAY = 2.0  # секунд, удваивается с каждой попыткой
+DM_CLOSED_TTL = 6 * 60 * 60  # секунд помнить закрытые личные сообщения
+
+# Приоритеты REST-запросов к Discord
+REST_CONCURRENCY = 8  # одновременных запросов (ответы на взаимодействия не ограничены)
+REST_BACKGROUND_LIMIT = 4  # из них фоновых (логи, ЛС, ветки, очистка)
+
+# Ответы на взаимодействия
+INTERACTION_DEADLINE = 3.0  # секунд у Discord на первый ответ
+INTERACTION_DEFER_MARGIN = 0.8  # за сколько секунд до срока отвечать defer автоматически
+INTERACTION_NEAR_MISS = 0.5  # ответ, оставивший меньше секунд до срока, считается почти опоздавшим
+
+# Архив решенных заявок
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "30"))  # 0 - не архивировать
+ARCHIVE_BATCH_SIZE = 500  # заявок за одну транзакцию
+ARCHIVE_BATCH_PAUSE = 0.5  # секунд между пакетами, чтобы не занимать запись надолго
+ARCHIVE_INTERVAL = 6 * 60 * 60  # секунд между проходами архивации
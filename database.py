@@ -1,27 +1,146 @@
 import sqlite3
 import os
 import json
+import time
+import queue
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator, Sequence, Tuple, TypeVar
 
-DATABASE_PATH = "data/bot_database.db"
+from config import (
+    ARCHIVE_DATABASE_PATH,
+    DATABASE_PATH,
+    DB_POOL_SIZE,
+    DB_BUSY_TIMEOUT,
+    DB_CACHE_SIZE_KB,
+    DB_MMAP_SIZE,
+    DB_CACHED_STATEMENTS,
+)
+from models import (
+    ACTIVE_STATUSES,
+    APPLICATION_COLUMNS,
+    GUILD_SETTINGS_COLUMNS,
+    Application,
+    ArchiveStats,
+    GuildModerators,
+    GuildSettings,
+)
+
+
+class ConnectionPool:
+    """Пул долгоживущих подключений к SQLite.
+
+    Подключения открываются один раз (WAL, synchronous=NORMAL, busy timeout,
+    mmap и увеличенный кэш страниц) и переиспользуются между запросами вместе
+    с кэшем подготовленных выражений. Файл архива заявок подключается к
+    каждому соединению как схема archive.
+    """
+
+    def __init__(self, path: str, size: int, archive_path: str):
+        self.path = path
+        self.size = size
+        self.archive_path = archive_path
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает и настраивает новое подключение."""
+        for path in (self.path, self.archive_path):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(
+            self.path,
+            timeout=DB_BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=DB_CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT * 1000)}")
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        conn.execute("PRAGMA archive.journal_mode = WAL")
+        conn.execute("PRAGMA archive.synchronous = NORMAL")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._opened -= 1
+                    raise
+
+        return self._idle.get()
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Выдает подключение из пула на время блока with."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self) -> None:
+        """Закрывает все свободные подключения."""
+        with self._lock:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._opened -= 1
+
+
+_pool = ConnectionPool(DATABASE_PATH, DB_POOL_SIZE, ARCHIVE_DATABASE_PATH)
 
 
 def get_connection():
-    """Создает подключение к базе данных."""
-    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Возвращает подключение из пула (использовать через with)."""
+    return _pool.connection()
 
 
-def init_database():
-    """Инициализирует базу данных и создает таблицы."""
-    conn = get_connection()
-    cursor = conn.cursor()
+# ==================== Migrations ====================
+
+def _column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    """Проверяет наличие колонки в таблице."""
+    return any(row['name'] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, declaration: str) -> None:
+    """Добавляет колонку, если её ещё нет."""
+    if not _column_exists(conn, table, column):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
 
+
+def _migration_initial_schema(conn: sqlite3.Connection) -> None:
     # Таблица настроек гильдии
-    cursor.execute("""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS guild_settings (
             guild_id INTEGER PRIMARY KEY,
             clan_name TEXT DEFAULT 'Клан',
@@ -33,19 +152,12 @@ def init_database():
             welcome_role_id INTEGER,
             welcome_image_url TEXT,
             moderator_roles TEXT DEFAULT '[]',
-            moderator_users TEXT DEFAULT '[]',
-            logs_channel_id INTEGER
+            moderator_users TEXT DEFAULT '[]'
         )
     """)
 
-    # Миграция: добавляем колонку logs_channel_id если её нет
-    try:
-        cursor.execute("ALTER TABLE guild_settings ADD COLUMN logs_channel_id INTEGER")
-    except sqlite3.OperationalError:
-        pass  # Колонка уже существует
-
     # Таблица заявок
-    cursor.execute("""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS applications (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             guild_id INTEGER,
@@ -66,58 +178,395 @@ def init_database():
         )
     """)
 
-    conn.commit()
-    conn.close()
+
+def _migration_logs_channel(conn: sqlite3.Connection) -> None:
+    _add_column(conn, "guild_settings", "logs_channel_id", "INTEGER")
+
+
+def _migration_application_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_applications_guild_user_status
+        ON applications (guild_id, user_id, status)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_status ON applications (status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_message ON applications (message_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_channel ON applications (channel_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_applications_member_thread ON applications (member_thread_id)")
+
+
+def _migration_command_sync(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS command_sync (
+            guild_id INTEGER PRIMARY KEY,
+            command_hash TEXT NOT NULL,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _migration_jobs(conn: sqlite3.Connection) -> None:
+    # Очередь фоновых задач (побочные действия после решений по заявкам)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            run_at REAL NOT NULL,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_run_at ON jobs (status, run_at)")
+
+    # Задачи, исчерпавшие попытки
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dead_jobs (
+            id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            last_error TEXT,
+            created_at TIMESTAMP,
+            failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _migration_application_mode(conn: sqlite3.Connection) -> None:
+    # 'channel' - текстовый канал на заявку, 'thread' - приватная ветка в review_channel_id
+    _add_column(conn, "guild_settings", "application_mode", "TEXT DEFAULT 'channel'")
+    _add_column(conn, "guild_settings", "review_channel_id", "INTEGER")
+
+
+def _migration_channel_pool(conn: sqlite3.Connection) -> None:
+    # Заранее созданные скрытые каналы заявок
+    _add_column(conn, "guild_settings", "channel_pool_size", "INTEGER DEFAULT 0")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS channel_pool (
+            channel_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_channel_pool_guild ON channel_pool (guild_id, category_id)")
+
+
+def _migration_guild_moderators(conn: sqlite3.Connection) -> None:
+    # Модераторы отдельными строками вместо JSON-списков в guild_settings
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS guild_moderators (
+            guild_id INTEGER NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('role', 'user')),
+            target_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, kind, target_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_guild_moderators_target ON guild_moderators (kind, target_id)")
+
+    rows = conn.execute("SELECT guild_id, moderator_roles, moderator_users FROM guild_settings").fetchall()
+    moderators = []
+    for row in rows:
+        for kind, column in (('role', 'moderator_roles'), ('user', 'moderator_users')):
+            try:
+                target_ids = json.loads(row[column]) if row[column] else []
+            except ValueError:
+                continue
+            moderators.extend((row['guild_id'], kind, int(target_id)) for target_id in target_ids)
+    conn.executemany(
+        "INSERT OR IGNORE INTO guild_moderators (guild_id, kind, target_id) VALUES (?, ?, ?)",
+        moderators
+    )
+    # Старые колонки moderator_roles/moderator_users больше не читаются и не пишутся
+
+
+# Миграции применяются строго по возрастанию версии.
+# Новые миграции добавляются только в конец списка.
+MIGRATIONS = [
+    (1, "Базовые таблицы guild_settings и applications", _migration_initial_schema),
+    (2, "Колонка logs_channel_id", _migration_logs_channel),
+    (3, "Индексы таблицы applications", _migration_application_indexes),
+    (4, "Таблица command_sync", _migration_command_sync),
+    (5, "Очередь задач jobs и dead_jobs", _migration_jobs),
+    (6, "Режим заявок application_mode и review_channel_id", _migration_application_mode),
+    (7, "Пул каналов заявок channel_pool", _migration_channel_pool),
+    (8, "Таблица guild_moderators вместо JSON-списков", _migration_guild_moderators),
+]
+
+
+def _ensure_archive_schema(conn: sqlite3.Connection) -> None:
+    # Архив живет в отдельном файле, поэтому не привязан к user_version основной базы.
+    # Колонки повторяют applications: новая колонка заявки добавляется и сюда.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive.applications_archive (
+            id INTEGER PRIMARY KEY,
+            guild_id INTEGER,
+            user_id INTEGER,
+            username TEXT,
+            static TEXT,
+            hours_per_day TEXT,
+            age_oos TEXT,
+            ready_online TEXT,
+            how_found TEXT,
+            status TEXT,
+            message_id INTEGER,
+            channel_id INTEGER,
+            member_thread_id INTEGER,
+            moderator_id INTEGER,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS archive.idx_applications_archive_guild_user
+        ON applications_archive (guild_id, user_id)
+    """)
+
+
+def get_schema_version() -> int:
+    """Возвращает текущую версию схемы базы данных."""
+    with get_connection() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def init_database():
+    """Инициализирует базу данных и применяет недостающие миграции.
+
+    Версия схемы хранится в PRAGMA user_version. Каждая миграция выполняется
+    в своей транзакции BEGIN IMMEDIATE, поэтому несколько процессов могут
+    запускаться одновременно и не применят одну миграцию дважды.
+    """
+    with get_connection() as conn:
+        for version, description, migrate in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = conn.execute("PRAGMA user_version").fetchone()[0]
+                if current >= version:
+                    conn.rollback()
+                    continue
+
+                migrate(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            print(f"[+] Применена миграция {version}: {description}")
+
+        _ensure_archive_schema(conn)
+        conn.commit()
 
 
 # ==================== Guild Settings ====================
 
-def get_guild_settings(guild_id: int) -> Optional[Dict[str, Any]]:
-    """Получает настройки гильдии."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM guild_settings WHERE guild_id = ?", (guild_id,))
-    row = cursor.fetchone()
-    conn.close()
+class SettingsCache:
+    """Write-through кэш настроек гильдий в памяти.
+
+    Хранит уже разобранные настройки (в том числе отсутствие настроек),
+    поэтому повторные чтения не обращаются к базе и не декодируют JSON.
+    Модели GuildSettings неизменяемы, поэтому одна копия отдается всем вызывающим.
+    """
 
-    if row:
-        data = dict(row)
-        data['moderator_roles'] = json.loads(data['moderator_roles']) if data.get('moderator_roles') else []
-        data['moderator_users'] = json.loads(data['moderator_users']) if data.get('moderator_users') else []
-        return data
-    return None
+    def __init__(self):
+        self._data: Dict[int, Optional[GuildSettings]] = {}
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, guild_id: int):
+        """Возвращает (найдено, настройки) и обновляет счетчики."""
+        try:
+            value = self._data[guild_id]
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def generation(self, guild_id: int) -> int:
+        return self._generations.get(guild_id, 0)
+
+    def fill(self, guild_id: int, value: Optional[GuildSettings], generation: int) -> None:
+        """Кладет прочитанное значение, если настройки не менялись во время чтения."""
+        with self._lock:
+            if self._generations.get(guild_id, 0) == generation:
+                self._data[guild_id] = value
+
+    def store(self, guild_id: int, value: Optional[GuildSettings]) -> None:
+        """Записывает актуальное значение после сохранения в базу."""
+        with self._lock:
+            self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+            self._data[guild_id] = value
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
+
+
+settings_cache = SettingsCache()
+
+
+def get_guild_settings(guild_id: int) -> Optional[GuildSettings]:
+    """Получает настройки гильдии (из кэша, при промахе - из базы)."""
+    found, value = settings_cache.lookup(guild_id)
+    if found:
+        return value
+    return _load_guild_settings(guild_id)
+
+
+def _load_guild_settings(guild_id: int) -> Optional[GuildSettings]:
+    """Читает настройки гильдии из базы и кладет их в кэш."""
+    generation = settings_cache.generation(guild_id)
+    with get_connection() as conn:
+        row = conn.execute(
+            f"SELECT {GUILD_SETTINGS_COLUMNS} FROM guild_settings WHERE guild_id = ?", (guild_id,)
+        ).fetchone()
+
+    settings = GuildSettings.from_row(row)
+    settings_cache.fill(guild_id, settings, generation)
+    return settings
 
 
 def save_guild_settings(guild_id: int, **kwargs) -> None:
-    """Сохраняет настройки гильдии."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Преобразуем списки в JSON
-    for key in ['moderator_roles', 'moderator_users']:
-        if key in kwargs and isinstance(kwargs[key], list):
-            kwargs[key] = json.dumps(kwargs[key])
-
-    existing = get_guild_settings(guild_id)
-
-    if existing:
-        # Update
-        set_clause = ", ".join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [guild_id]
-        cursor.execute(f"UPDATE guild_settings SET {set_clause} WHERE guild_id = ?", values)
+    """Сохраняет настройки гильдии и обновляет кэш."""
+    columns = ["guild_id"] + list(kwargs.keys())
+    placeholders = ", ".join(["?" for _ in columns])
+    values = [guild_id] + list(kwargs.values())
+    if kwargs:
+        set_clause = ", ".join([f"{k} = excluded.{k}" for k in kwargs.keys()])
+        conflict = f"DO UPDATE SET {set_clause}"
     else:
-        # Insert
-        kwargs['guild_id'] = guild_id
-        columns = ", ".join(kwargs.keys())
-        placeholders = ", ".join(["?" for _ in kwargs])
-        cursor.execute(f"INSERT INTO guild_settings ({columns}) VALUES ({placeholders})", list(kwargs.values()))
+        conflict = "DO NOTHING"
+
+    with get_connection() as conn:
+        with conn:
+            conn.execute(
+                f"INSERT INTO guild_settings ({', '.join(columns)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(guild_id) {conflict}",
+                values
+            )
+        row = conn.execute(
+            f"SELECT {GUILD_SETTINGS_COLUMNS} FROM guild_settings WHERE guild_id = ?", (guild_id,)
+        ).fetchone()
+
+    settings_cache.store(guild_id, GuildSettings.from_row(row))
+
 
-    conn.commit()
-    conn.close()
+# ==================== Moderators ====================
+
+def get_guild_moderators(guild_id: int) -> GuildModerators:
+    """Получает роли и пользователей-модераторов гильдии."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT kind, target_id FROM guild_moderators WHERE guild_id = ?", (guild_id,)
+        ).fetchall()
+    return GuildModerators(
+        role_ids=frozenset(row['target_id'] for row in rows if row['kind'] == 'role'),
+        user_ids=frozenset(row['target_id'] for row in rows if row['kind'] == 'user')
+    )
+
+
+def set_guild_moderators(guild_id: int, role_ids: Sequence[int], user_ids: Sequence[int]) -> None:
+    """Заменяет всех модераторов гильдии."""
+    with get_connection() as conn, conn:
+        conn.execute("DELETE FROM guild_moderators WHERE guild_id = ?", (guild_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO guild_moderators (guild_id, kind, target_id) VALUES (?, ?, ?)",
+            [(guild_id, 'role', role_id) for role_id in role_ids]
+            + [(guild_id, 'user', user_id) for user_id in user_ids]
+        )
+
+
+def add_guild_moderator(guild_id: int, kind: str, target_id: int) -> bool:
+    """Добавляет роль ('role') или пользователя ('user') в модераторы. False, если уже был."""
+    with get_connection() as conn, conn:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO guild_moderators (guild_id, kind, target_id) VALUES (?, ?, ?)",
+            (guild_id, kind, target_id)
+        )
+    return cursor.rowcount > 0
+
+
+def remove_guild_moderator(guild_id: int, kind: str, target_id: int) -> bool:
+    """Убирает роль или пользователя из модераторов. False, если его там не было."""
+    with get_connection() as conn, conn:
+        cursor = conn.execute(
+            "DELETE FROM guild_moderators WHERE guild_id = ? AND kind = ? AND target_id = ?",
+            (guild_id, kind, target_id)
+        )
+    return cursor.rowcount > 0
+
+
+def get_moderator_guilds(user_id: int) -> List[int]:
+    """ID гильдий, где пользователь назначен модератором напрямую (не через роль)."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT guild_id FROM guild_moderators WHERE kind = 'user' AND target_id = ?", (user_id,)
+        ).fetchall()
+    return [row['guild_id'] for row in rows]
 
 
 # ==================== Applications ====================
 
+
+class MemberThreadIndex:
+    """Множество пользователей с ветками участника по гильдиям.
+
+    Позволяет при выходе участника с сервера не обращаться к базе, если
+    веток у него точно нет. Возможны ложные срабатывания (тогда просто
+    выполняется обычный запрос), но не пропуски. Пока индекс не загружен,
+    считается, что ветка может быть у любого.
+    """
+
+    def __init__(self):
+        self._owners: Dict[int, set] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def might_own(self, guild_id: int, user_id: int) -> bool:
+        if not self.loaded:
+            return True
+        owners = self._owners.get(guild_id)
+        return owners is not None and user_id in owners
+
+    def add(self, guild_id: int, user_id: int) -> None:
+        with self._lock:
+            self._owners.setdefault(guild_id, set()).add(user_id)
+
+    def discard(self, guild_id: int, user_id: int) -> None:
+        with self._lock:
+            owners = self._owners.get(guild_id)
+            if owners is not None:
+                owners.discard(user_id)
+
+    def load(self, pairs) -> None:
+        """Дополняет индекс парами (guild_id, user_id) из базы."""
+        with self._lock:
+            for guild_id, user_id in pairs:
+                self._owners.setdefault(guild_id, set()).add(user_id)
+            self.loaded = True
+
+
+member_thread_owners = MemberThreadIndex()
+
+
+def load_member_thread_owners() -> int:
+    """Загружает индекс владельцев веток участника, возвращает число записей."""
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT DISTINCT guild_id, user_id FROM applications
+            WHERE member_thread_id IS NOT NULL
+        """).fetchall()
+    member_thread_owners.load((row['guild_id'], row['user_id']) for row in rows)
+    return len(rows)
+
+
 def create_application(
     guild_id: int,
     user_id: int,
@@ -129,93 +578,580 @@ def create_application(
     how_found: Optional[str] = None
 ) -> int:
     """Создает новую заявку и возвращает её ID."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO applications
-        (guild_id, user_id, username, static, hours_per_day, age_oos, ready_online, how_found)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (guild_id, user_id, username, static, hours_per_day, age_oos, ready_online, how_found))
-
-    application_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    with get_connection() as conn, conn:
+        cursor = conn.execute("""
+            INSERT INTO applications
+            (guild_id, user_id, username, static, hours_per_day, age_oos, ready_online, how_found)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (guild_id, user_id, username, static, hours_per_day, age_oos, ready_online, how_found))
+        return cursor.lastrowid
 
-    return application_id
 
+def get_application(application_id: int) -> Optional[Application]:
+    """Получает заявку по ID, в том числе перенесенную в архив."""
+    with get_connection() as conn:
+        row = conn.execute(
+            f"SELECT {APPLICATION_COLUMNS} FROM applications WHERE id = ?", (application_id,)
+        ).fetchone()
+        if row is None:
+            row = conn.execute(
+                f"SELECT {APPLICATION_COLUMNS} FROM archive.applications_archive WHERE id = ?", (application_id,)
+            ).fetchone()
+    return Application.from_row(row)
 
-def get_application(application_id: int) -> Optional[Dict[str, Any]]:
-    """Получает заявку по ID."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM applications WHERE id = ?", (application_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
 
-
-def get_application_by_message(message_id: int) -> Optional[Dict[str, Any]]:
+def get_application_by_message(message_id: int) -> Optional[Application]:
     """Получает заявку по ID сообщения."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM applications WHERE message_id = ?", (message_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    with get_connection() as conn:
+        row = conn.execute(
+            f"SELECT {APPLICATION_COLUMNS} FROM applications WHERE message_id = ?", (message_id,)
+        ).fetchone()
+    return Application.from_row(row)
 
 
-def get_application_by_channel(channel_id: int) -> Optional[Dict[str, Any]]:
+def get_application_by_channel(channel_id: int) -> Optional[Application]:
     """Получает заявку по ID канала."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM applications WHERE channel_id = ?", (channel_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    with get_connection() as conn:
+        row = conn.execute(
+            f"SELECT {APPLICATION_COLUMNS} FROM applications WHERE channel_id = ?", (channel_id,)
+        ).fetchone()
+    return Application.from_row(row)
 
 
 def update_application(application_id: int, **kwargs) -> None:
     """Обновляет заявку."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
     kwargs['updated_at'] = datetime.now().isoformat()
     set_clause = ", ".join([f"{k} = ?" for k in kwargs.keys()])
     values = list(kwargs.values()) + [application_id]
 
-    cursor.execute(f"UPDATE applications SET {set_clause} WHERE id = ?", values)
-    conn.commit()
-    conn.close()
+    with get_connection() as conn, conn:
+        row = conn.execute(
+            f"UPDATE applications SET {set_clause} WHERE id = ? RETURNING guild_id, user_id",
+            values
+        ).fetchone()
+
+    if row and kwargs.get('member_thread_id'):
+        member_thread_owners.add(row['guild_id'], row['user_id'])
 
 
-def get_pending_application(guild_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+def clear_member_threads(application_ids: Sequence[int]) -> None:
+    """Одним запросом сбрасывает member_thread_id у нескольких заявок."""
+    if not application_ids:
+        return
+    placeholders = ", ".join(["?" for _ in application_ids])
+    with get_connection() as conn, conn:
+        conn.execute(
+            f"UPDATE applications SET member_thread_id = NULL, updated_at = ? WHERE id IN ({placeholders})",
+            [datetime.now().isoformat(), *application_ids]
+        )
+
+
+def get_pending_application(guild_id: int, user_id: int) -> Optional[Application]:
     """Проверяет, есть ли у пользователя активная заявка."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM applications
-        WHERE guild_id = ? AND user_id = ? AND status IN ('pending', 'reviewing')
-        ORDER BY created_at DESC
-        LIMIT 1
-    """, (guild_id, user_id))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
-
-
-def get_user_member_threads(guild_id: int, user_id: int) -> List[Dict[str, Any]]:
+    with get_connection() as conn:
+        row = conn.execute(f"""
+            SELECT {APPLICATION_COLUMNS} FROM applications
+            WHERE guild_id = ? AND user_id = ? AND status IN ('pending', 'reviewing')
+            ORDER BY created_at DESC
+            LIMIT 1
+        """, (guild_id, user_id)).fetchone()
+    return Application.from_row(row)
+
+
+def get_user_member_threads(guild_id: int, user_id: int) -> List[Application]:
     """Получает все ветки участника для пользователя."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM applications
-        WHERE guild_id = ? AND user_id = ? AND member_thread_id IS NOT NULL AND status = 'accepted'
-    """, (guild_id, user_id))
-    rows = cursor.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT {APPLICATION_COLUMNS} FROM applications
+            WHERE guild_id = ? AND user_id = ? AND member_thread_id IS NOT NULL AND status = 'accepted'
+        """, (guild_id, user_id)).fetchall()
+    return [Application.from_row(row) for row in rows]
+
+
+def get_application_resources(
+    shard_count: Optional[int] = None,
+    shard_ids: Optional[Sequence[int]] = None
+) -> List[Application]:
+    """Заявки с каналами (активные) и ветками участников гильдий этого процесса (для сверки при запуске)."""
+    shard_clause, params = _shard_filter(shard_count, shard_ids)
+    with get_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT {APPLICATION_COLUMNS} FROM applications
+            WHERE ((status IN ('pending', 'reviewing') AND channel_id IS NOT NULL)
+                OR member_thread_id IS NOT NULL){shard_clause}
+        """, params).fetchall()
+    return [Application.from_row(row) for row in rows]
+
+
+def mark_orphaned_applications(
+    orphaned: Sequence[Tuple[int, int]],
+    lost_threads: Sequence[Tuple[int, int]]
+) -> Tuple[int, int]:
+    """Одной транзакцией помечает заявки без канала и сбрасывает пропавшие ветки участников.
+
+    orphaned - пары (id заявки, channel_id): активная заявка получает статус
+    'orphaned', если канал и статус не изменились с момента сверки.
+    lost_threads - пары (id заявки, member_thread_id).
+    Возвращает число помеченных заявок и сброшенных веток.
+    """
+    now = datetime.now().isoformat()
+    with get_connection() as conn, conn:
+        before = conn.total_changes
+        conn.executemany("""
+            UPDATE applications SET status = 'orphaned', updated_at = ?
+            WHERE id = ? AND channel_id = ? AND status IN ('pending', 'reviewing')
+        """, [(now, application_id, channel_id) for application_id, channel_id in orphaned])
+        marked = conn.total_changes - before
+
+        before = conn.total_changes
+        conn.executemany("""
+            UPDATE applications SET member_thread_id = NULL, updated_at = ?
+            WHERE id = ? AND member_thread_id = ?
+        """, [(now, application_id, thread_id) for application_id, thread_id in lost_threads])
+        cleared = conn.total_changes - before
+
+    # Индекс member_thread_owners допускает лишние записи: они уберутся при выходе участника
+    return marked, cleared
+
+
+def fail_unpublished_applications(max_age_minutes: int) -> int:
+    """Закрывает активные заявки, которые так и не получили канал.
+
+    Такие заявки остаются после сбоя подачи (например, категория заполнена)
+    и без этого навсегда блокировали бы заявителю подачу новой. Свежие
+    заявки не трогаются: их может прямо сейчас размещать другой процесс.
+    """
+    with get_connection() as conn, conn:
+        cursor = conn.execute("""
+            UPDATE applications SET status = 'failed', updated_at = ?
+            WHERE status = 'pending' AND channel_id IS NULL
+                AND created_at < datetime('now', ?)
+        """, (datetime.now().isoformat(), f"-{max_age_minutes} minutes"))
+    return cursor.rowcount
+
+
+# ==================== Archive ====================
+
+def archive_applications(cutoff: datetime, batch_size: int) -> int:
+    """Переносит в архив пакет решенных заявок, не менявшихся с cutoff.
+
+    Заявки с веткой участника остаются в рабочей таблице: они нужны при
+    выходе участника и сверке веток. ID не переиспользуются (AUTOINCREMENT),
+    поэтому архивная заявка не пересечется с новой. В режиме WAL транзакция
+    над двумя файлами атомарна только для каждого файла отдельно, поэтому
+    строка сначала копируется в архив (INSERT OR REPLACE), а потом удаляется:
+    после сбоя между шагами копия просто перезапишется следующим пакетом.
+    Возвращает число перенесенных заявок.
+    """
+    placeholders = ", ".join(["?" for _ in ACTIVE_STATUSES])
+    with get_connection() as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(f"""
+            SELECT id FROM applications
+            WHERE status NOT IN ({placeholders})
+                AND member_thread_id IS NULL
+                AND datetime(COALESCE(updated_at, created_at)) < datetime(?)
+            ORDER BY id
+            LIMIT ?
+        """, [*ACTIVE_STATUSES, cutoff.isoformat(), batch_size]).fetchall()
+        if not rows:
+            return 0
+
+        application_ids = [row['id'] for row in rows]
+        id_placeholders = ", ".join(["?" for _ in application_ids])
+        conn.execute(f"""
+            INSERT OR REPLACE INTO archive.applications_archive ({APPLICATION_COLUMNS}, archived_at)
+            SELECT {APPLICATION_COLUMNS}, ? FROM applications WHERE id IN ({id_placeholders})
+        """, [datetime.now().isoformat(), *application_ids])
+        conn.execute(f"DELETE FROM applications WHERE id IN ({id_placeholders})", application_ids)
+    return len(application_ids)
+
+
+def get_archive_stats() -> ArchiveStats:
+    """Число заявок и размер рабочей базы и архива."""
+    with get_connection() as conn:
+        hot = conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+        archived = conn.execute("SELECT COUNT(*) FROM archive.applications_archive").fetchone()[0]
+
+        sizes = {}
+        free = 0
+        for schema in ('main', 'archive'):
+            page_size = conn.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+            sizes[schema] = conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0] * page_size
+            free += conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0] * page_size
+
+    return ArchiveStats(
+        hot_applications=hot,
+        archived_applications=archived,
+        database_bytes=sizes['main'],
+        archive_bytes=sizes['archive'],
+        free_bytes=free
+    )
+
+
+def compact_databases() -> int:
+    """Сжимает рабочую базу и архив (VACUUM), возвращает число освобожденных байт."""
+    before = get_archive_stats()
+    with get_connection() as conn:
+        for schema in ('main', 'archive'):
+            conn.execute(f"VACUUM {schema}")
+            conn.execute(f"PRAGMA {schema}.wal_checkpoint(TRUNCATE)")
+    after = get_archive_stats()
+    return (before.database_bytes + before.archive_bytes) - (after.database_bytes + after.archive_bytes)
+
+
+# ==================== Jobs ====================
+
+# Задача для постановки в очередь: (kind, payload)
+JobSpec = Tuple[str, Dict[str, Any]]
+
+
+def _parse_job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    if not row:
+        return None
+    data = dict(row)
+    data['payload'] = json.loads(data['payload'])
+    return data
+
+
+def _shard_filter(shard_count: Optional[int], shard_ids: Optional[Sequence[int]]) -> Tuple[str, List[Any]]:
+    """Условие отбора задач гильдий, принадлежащих шардам этого процесса."""
+    if not shard_count or shard_ids is None:
+        return "", []
+    placeholders = ", ".join(["?" for _ in shard_ids])
+    return f" AND ((guild_id >> 22) % ?) IN ({placeholders})", [shard_count, *shard_ids]
+
+
+def _insert_jobs(conn: sqlite3.Connection, guild_id: int, jobs: Sequence[JobSpec], run_at: float) -> None:
+    conn.executemany(
+        "INSERT INTO jobs (guild_id, kind, payload, run_at) VALUES (?, ?, ?, ?)",
+        [(guild_id, kind, json.dumps(payload, ensure_ascii=False), run_at) for kind, payload in jobs]
+    )
+
+
+def enqueue_jobs(guild_id: int, jobs: Sequence[JobSpec]) -> None:
+    """Ставит задачи гильдии в очередь."""
+    with get_connection() as conn, conn:
+        _insert_jobs(conn, guild_id, jobs, time.time())
+
+
+def update_application_and_enqueue(
+    application_id: int,
+    guild_id: int,
+    jobs: Sequence[JobSpec],
+    expected_status: Optional[Sequence[str]] = None,
+    **kwargs
+) -> bool:
+    """Обновляет заявку и ставит задачи в очередь одной транзакцией.
+
+    Если задан expected_status, обновление выполняется только из этих
+    статусов (compare-and-set): проигравший параллельный клик получает
+    False, и его задачи не ставятся в очередь.
+    """
+    kwargs['updated_at'] = datetime.now().isoformat()
+    set_clause = ", ".join([f"{k} = ?" for k in kwargs.keys()])
+    values = list(kwargs.values()) + [application_id]
+
+    status_clause = ""
+    if expected_status is not None:
+        status_clause = f" AND status IN ({', '.join(['?' for _ in expected_status])})"
+        values.extend(expected_status)
+
+    with get_connection() as conn, conn:
+        row = conn.execute(
+            f"UPDATE applications SET {set_clause} WHERE id = ?{status_clause} RETURNING id",
+            values
+        ).fetchone()
+        if row is None:
+            return False
+        _insert_jobs(conn, guild_id, jobs, time.time())
+    return True
+
+
+def claim_job(shard_count: Optional[int] = None, shard_ids: Optional[Sequence[int]] = None) -> Optional[Dict[str, Any]]:
+    """Атомарно забирает ближайшую готовую к выполнению задачу."""
+    shard_clause, shard_params = _shard_filter(shard_count, shard_ids)
+    with get_connection() as conn, conn:
+        row = conn.execute(f"""
+            UPDATE jobs SET status = 'running', attempts = attempts + 1
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE status = 'pending' AND run_at <= ?{shard_clause}
+                ORDER BY run_at, id
+                LIMIT 1
+            )
+            RETURNING *
+        """, [time.time(), *shard_params]).fetchone()
+    return _parse_job(row)
+
+
+def next_job_time(shard_count: Optional[int] = None, shard_ids: Optional[Sequence[int]] = None) -> Optional[float]:
+    """Возвращает время запуска ближайшей отложенной задачи."""
+    shard_clause, shard_params = _shard_filter(shard_count, shard_ids)
+    with get_connection() as conn:
+        row = conn.execute(
+            f"SELECT MIN(run_at) AS run_at FROM jobs WHERE status = 'pending'{shard_clause}",
+            shard_params
+        ).fetchone()
+    return row['run_at']
+
+
+def complete_job(job_id: int) -> None:
+    """Удаляет выполненную задачу."""
+    with get_connection() as conn, conn:
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+def retry_job(job_id: int, run_at: float, error: str) -> None:
+    """Возвращает задачу в очередь для повторной попытки."""
+    with get_connection() as conn, conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'pending', run_at = ?, last_error = ? WHERE id = ?",
+            (run_at, error, job_id)
+        )
+
+
+def bury_job(job_id: int, error: str) -> None:
+    """Переносит задачу в dead_jobs."""
+    with get_connection() as conn, conn:
+        conn.execute("""
+            INSERT INTO dead_jobs (id, guild_id, kind, payload, attempts, last_error, created_at)
+            SELECT id, guild_id, kind, payload, attempts, ?, created_at FROM jobs WHERE id = ?
+        """, (error, job_id))
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+def reset_running_jobs(shard_count: Optional[int] = None, shard_ids: Optional[Sequence[int]] = None) -> int:
+    """Возвращает в очередь задачи, прерванные остановкой бота."""
+    shard_clause, shard_params = _shard_filter(shard_count, shard_ids)
+    with get_connection() as conn, conn:
+        cursor = conn.execute(
+            f"UPDATE jobs SET status = 'pending' WHERE status = 'running'{shard_clause}",
+            shard_params
+        )
+        return cursor.rowcount
+
+
+# ==================== Channel Pool ====================
+
+def add_pooled_channel(channel_id: int, guild_id: int, category_id: int) -> None:
+    """Добавляет созданный канал в пул."""
+    with get_connection() as conn, conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO channel_pool (channel_id, guild_id, category_id) VALUES (?, ?, ?)",
+            (channel_id, guild_id, category_id)
+        )
+
+
+def claim_pooled_channel(guild_id: int, category_id: int) -> Optional[int]:
+    """Атомарно забирает самый старый канал пула из категории."""
+    with get_connection() as conn, conn:
+        row = conn.execute("""
+            DELETE FROM channel_pool
+            WHERE channel_id = (
+                SELECT channel_id FROM channel_pool
+                WHERE guild_id = ? AND category_id = ?
+                ORDER BY created_at, channel_id
+                LIMIT 1
+            )
+            RETURNING channel_id
+        """, (guild_id, category_id)).fetchone()
+    return row['channel_id'] if row else None
+
+
+def get_pooled_channels(guild_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Получает каналы пула (всех гильдий или одной)."""
+    with get_connection() as conn:
+        if guild_id is None:
+            rows = conn.execute("SELECT * FROM channel_pool").fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM channel_pool WHERE guild_id = ?", (guild_id,)).fetchall()
     return [dict(row) for row in rows]
 
 
+def remove_pooled_channels(channel_ids: Sequence[int]) -> None:
+    """Удаляет каналы из пула."""
+    if not channel_ids:
+        return
+    placeholders = ", ".join(["?" for _ in channel_ids])
+    with get_connection() as conn, conn:
+        conn.execute(f"DELETE FROM channel_pool WHERE channel_id IN ({placeholders})", list(channel_ids))
+
+
+# ==================== Command Sync ====================
+
+def get_command_hashes() -> Dict[int, str]:
+    """Возвращает хэши последних синхронизированных команд по гильдиям."""
+    with get_connection() as conn:
+        rows = conn.execute("SELECT guild_id, command_hash FROM command_sync").fetchall()
+    return {row['guild_id']: row['command_hash'] for row in rows}
+
+
+def save_command_hash(guild_id: int, command_hash: str) -> None:
+    """Запоминает хэш команд, синхронизированных для гильдии."""
+    with get_connection() as conn, conn:
+        conn.execute("""
+            INSERT INTO command_sync (guild_id, command_hash, synced_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(guild_id) DO UPDATE SET
+                command_hash = excluded.command_hash,
+                synced_at = excluded.synced_at
+        """, (guild_id, command_hash))
+
+
+# ==================== Async API ====================
+
+T = TypeVar('T')
+
+
+class AsyncDatabase:
+    """Асинхронная обертка над функциями модуля.
+
+    Все запросы выполняются в выделенных потоках, поэтому обращения к диску
+    не блокируют event loop бота (heartbeat и обработку взаимодействий).
+    """
+
+    def __init__(self):
+        # Один поток на подключение пула: в режиме WAL чтения идут параллельно
+        self._executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Выполняет синхронную функцию в потоке базы данных."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self) -> None:
+        """Дожидается завершения запросов и закрывает подключения."""
+        self._executor.shutdown(wait=True)
+        _pool.close()
+
+    async def init_database(self) -> None:
+        await self.run(init_database)
+
+    async def get_schema_version(self) -> int:
+        return await self.run(get_schema_version)
+
+    async def get_guild_settings(self, guild_id: int) -> Optional[GuildSettings]:
+        # Попадание в кэш обслуживается без перехода в поток базы
+        found, value = settings_cache.lookup(guild_id)
+        if found:
+            return value
+        return await self.run(_load_guild_settings, guild_id)
+
+    async def save_guild_settings(self, guild_id: int, **kwargs) -> None:
+        await self.run(save_guild_settings, guild_id, **kwargs)
+
+    async def get_guild_moderators(self, guild_id: int) -> GuildModerators:
+        return await self.run(get_guild_moderators, guild_id)
+
+    async def set_guild_moderators(self, guild_id: int, role_ids: Sequence[int], user_ids: Sequence[int]) -> None:
+        await self.run(set_guild_moderators, guild_id, role_ids, user_ids)
+
+    async def add_guild_moderator(self, guild_id: int, kind: str, target_id: int) -> bool:
+        return await self.run(add_guild_moderator, guild_id, kind, target_id)
+
+    async def remove_guild_moderator(self, guild_id: int, kind: str, target_id: int) -> bool:
+        return await self.run(remove_guild_moderator, guild_id, kind, target_id)
+
+    async def get_moderator_guilds(self, user_id: int) -> List[int]:
+        return await self.run(get_moderator_guilds, user_id)
+
+    async def create_application(self, **kwargs) -> int:
+        return await self.run(create_application, **kwargs)
+
+    async def get_application(self, application_id: int) -> Optional[Application]:
+        return await self.run(get_application, application_id)
+
+    async def get_application_by_message(self, message_id: int) -> Optional[Application]:
+        return await self.run(get_application_by_message, message_id)
+
+    async def get_application_by_channel(self, channel_id: int) -> Optional[Application]:
+        return await self.run(get_application_by_channel, channel_id)
+
+    async def update_application(self, application_id: int, **kwargs) -> None:
+        await self.run(update_application, application_id, **kwargs)
+
+    async def get_pending_application(self, guild_id: int, user_id: int) -> Optional[Application]:
+        return await self.run(get_pending_application, guild_id, user_id)
+
+    async def get_user_member_threads(self, guild_id: int, user_id: int) -> List[Application]:
+        return await self.run(get_user_member_threads, guild_id, user_id)
+
+    async def clear_member_threads(self, application_ids: Sequence[int]) -> None:
+        await self.run(clear_member_threads, application_ids)
+
+    async def load_member_thread_owners(self) -> int:
+        return await self.run(load_member_thread_owners)
+
+    async def get_application_resources(self, shard_count: Optional[int] = None, shard_ids: Optional[Sequence[int]] = None) -> List[Application]:
+        return await self.run(get_application_resources, shard_count, shard_ids)
+
+    async def mark_orphaned_applications(self, orphaned: Sequence[Tuple[int, int]], lost_threads: Sequence[Tuple[int, int]]) -> Tuple[int, int]:
+        return await self.run(mark_orphaned_applications, orphaned, lost_threads)
+
+    async def fail_unpublished_applications(self, max_age_minutes: int) -> int:
+        return await self.run(fail_unpublished_applications, max_age_minutes)
+
+    async def archive_applications(self, cutoff: datetime, batch_size: int) -> int:
+        return await self.run(archive_applications, cutoff, batch_size)
+
+    async def get_archive_stats(self) -> ArchiveStats:
+        return await self.run(get_archive_stats)
+
+    async def compact_databases(self) -> int:
+        return await self.run(compact_databases)
+
+    async def enqueue_jobs(self, guild_id: int, jobs: Sequence[JobSpec]) -> None:
+        await self.run(enqueue_jobs, guild_id, jobs)
+
+    async def update_application_and_enqueue(
+        self,
+        application_id: int,
+        guild_id: int,
+        jobs: Sequence[JobSpec],
+        expected_status: Optional[Sequence[str]] = None,
+        **kwargs
+    ) -> bool:
+        return await self.run(update_application_and_enqueue, application_id, guild_id, jobs, expected_status, **kwargs)
+
+    async def claim_job(self, shard_count: Optional[int] = None, shard_ids: Optional[Sequence[int]] = None) -> Optional[Dict[str, Any]]:
+        return await self.run(claim_job, shard_count, shard_ids)
+
+    async def next_job_time(self, shard_count: Optional[int] = None, shard_ids: Optional[Sequence[int]] = None) -> Optional[float]:
+        return await self.run(next_job_time, shard_count, shard_ids)
+
+    async def complete_job(self, job_id: int) -> None:
+        await self.run(complete_job, job_id)
+
+    async def retry_job(self, job_id: int, run_at: float, error: str) -> None:
+        await self.run(retry_job, job_id, run_at, error)
+
+    async def bury_job(self, job_id: int, error: str) -> None:
+        await self.run(bury_job, job_id, error)
+
+    async def reset_running_jobs(self, shard_count: Optional[int] = None, shard_ids: Optional[Sequence[int]] = None) -> int:
+        return await self.run(reset_running_jobs, shard_count, shard_ids)
+
+    async def add_pooled_channel(self, channel_id: int, guild_id: int, category_id: int) -> None:
+        await self.run(add_pooled_channel, channel_id, guild_id, category_id)
+
+    async def claim_pooled_channel(self, guild_id: int, category_id: int) -> Optional[int]:
+        return await self.run(claim_pooled_channel, guild_id, category_id)
+
+    async def get_pooled_channels(self, guild_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        return await self.run(get_pooled_channels, guild_id)
+
+    async def remove_pooled_channels(self, channel_ids: Sequence[int]) -> None:
+        await self.run(remove_pooled_channels, channel_ids)
+
+    async def get_command_hashes(self) -> Dict[int, str]:
+        return await self.run(get_command_hashes)
+
+    async def save_command_hash(self, guild_id: int, command_hash: str) -> None:
+        await self.run(save_command_hash, guild_id, command_hash)
+
+
+db = AsyncDatabase()
+
 # Инициализация при импорте
 init_database()
@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import logging
+from typing import List
+
+from config import BOT_TOKEN, SHARD_COUNT, CLUSTER_COUNT, CLUSTER_LOGS_DIR
+
+
+def split_shards(shard_count: int, cluster_count: int) -> List[List[int]]:
+    """Делит шарды на непрерывные диапазоны по кластерам."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    base, extra = divmod(shard_count, cluster_count)
+    ranges = []
+    start = 0
+    for cluster_id in range(cluster_count):
+        size = base + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+async def fetch_recommended_shards() -> int:
+    """Запрашивает у Discord рекомендованное число шардов."""
+    import discord
+
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(BOT_TOKEN)
+        shards, _, _ = await http.get_bot_gateway()
+        return shards
+    finally:
+        await http.close()
+
+
+def run_cluster(cluster_id: int, shard_ids: List[int], shard_count: int, force_sync: bool) -> None:
+    """Точка входа процесса-кластера.
+
+    Вывод процесса и логи discord.py пишутся в отдельный файл кластера.
+    """
+    import discord
+    from bot import run_bot
+
+    os.makedirs(CLUSTER_LOGS_DIR, exist_ok=True)
+    log_path = os.path.join(CLUSTER_LOGS_DIR, f"cluster-{cluster_id}.log")
+    log_file = open(log_path, "a", encoding="utf-8", buffering=1)
+    sys.stdout = log_file
+    sys.stderr = log_file
+
+    handler = logging.StreamHandler(log_file)
+    discord.utils.setup_logging(handler=handler)
+
+    print(f"[+] Кластер {cluster_id}: шарды {shard_ids[0]}-{shard_ids[-1]} из {shard_count}")
+    asyncio.run(run_bot(
+        force_sync=force_sync,
+        shard_ids=shard_ids,
+        shard_count=shard_count,
+        cluster_id=cluster_id
+    ))
+
+
+def main():
+    """Запускает несколько процессов бота, каждый со своим диапазоном шардов.
+
+    Все процессы работают с одной базой SQLite (WAL и busy timeout).
+    Кэши в памяти у каждого процесса свои, это безопасно: гильдия всегда
+    принадлежит одному шарду, а значит и одному кластеру.
+    """
+    parser = argparse.ArgumentParser(description="Запуск бота кластерами")
+    parser.add_argument("--clusters", type=int, default=CLUSTER_COUNT, help="число процессов")
+    parser.add_argument("--shards", type=int, default=SHARD_COUNT, help="общее число шардов")
+    parser.add_argument(
+        "--force-sync",
+        action="store_true",
+        help="синхронизировать команды во всех гильдиях, даже если они не менялись"
+    )
+    args = parser.parse_args()
+
+    # Миграции применяются один раз до запуска кластеров
+    from database import init_database
+    init_database()
+    print("[+] База данных инициализирована")
+
+    shard_count = args.shards or asyncio.run(fetch_recommended_shards())
+    clusters = split_shards(shard_count, args.clusters)
+    print(f"[+] Шардов: {shard_count}, кластеров: {len(clusters)}")
+
+    # spawn: процессы не наследуют открытые подключения к SQLite
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for cluster_id, shard_ids in enumerate(clusters):
+        process = context.Process(
+            target=run_cluster,
+            args=(cluster_id, shard_ids, shard_count, args.force_sync),
+            name=f"cluster-{cluster_id}"
+        )
+        process.start()
+        processes.append(process)
+        print(f"[+] Запущен кластер {cluster_id} (PID {process.pid}), шарды {shard_ids}")
+
+    try:
+        for process in processes:
+            process.join()
+            if process.exitcode:
+                print(f"[-] Кластер {process.name} завершился с кодом {process.exitcode}")
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from dataclasses import dataclass, fields
+from typing import Any, FrozenSet, NamedTuple, Optional, Sequence
+
+
+# Статусы заявки, по которой еще не принято решение
+ACTIVE_STATUSES = ('pending', 'reviewing')
+
+
+def _columns(model) -> str:
+    """Список колонок для SELECT в порядке полей модели."""
+    return ", ".join(field.name for field in fields(model))
+
+
+@dataclass(frozen=True, slots=True)
+class Application:
+    """Заявка в клан (строка таблицы applications)."""
+    id: int
+    guild_id: int
+    user_id: int
+    username: Optional[str]
+    static: Optional[str]
+    hours_per_day: Optional[str]
+    age_oos: Optional[str]
+    ready_online: Optional[str]
+    how_found: Optional[str]
+    status: str
+    message_id: Optional[int]
+    channel_id: Optional[int]
+    member_thread_id: Optional[int]
+    moderator_id: Optional[int]
+    created_at: Optional[str]
+    updated_at: Optional[str]
+
+    @property
+    def is_active(self) -> bool:
+        """Решение по заявке еще не принято."""
+        return self.status in ACTIVE_STATUSES
+
+    @classmethod
+    def from_row(cls, row: Optional[Sequence[Any]]) -> Optional['Application']:
+        """Строит модель из строки, выбранной с колонками APPLICATION_COLUMNS."""
+        return cls(*row) if row else None
+
+
+@dataclass(frozen=True, slots=True)
+class GuildSettings:
+    """Настройки гильдии (строка таблицы guild_settings).
+
+    Модераторы хранятся отдельно, в таблице guild_moderators (GuildModerators).
+    """
+    guild_id: int
+    clan_name: Optional[str] = 'Клан'
+    panel_image_url: Optional[str] = None
+    panel_text: Optional[str] = None
+    applications_category_id: Optional[int] = None
+    branch_channel_id: Optional[int] = None
+    member_role_id: Optional[int] = None
+    welcome_role_id: Optional[int] = None
+    welcome_image_url: Optional[str] = None
+    logs_channel_id: Optional[int] = None
+    application_mode: Optional[str] = 'channel'
+    review_channel_id: Optional[int] = None
+    channel_pool_size: Optional[int] = 0
+
+    @property
+    def thread_mode(self) -> bool:
+        """Заявки создаются приватными ветками в review_channel_id."""
+        return self.application_mode == 'thread'
+
+    @classmethod
+    def from_row(cls, row: Optional[Sequence[Any]]) -> Optional['GuildSettings']:
+        """Строит модель из строки, выбранной с колонками GUILD_SETTINGS_COLUMNS."""
+        return cls(*row) if row else None
+
+
+class GuildModerators(NamedTuple):
+    """Настроенные модераторы гильдии."""
+    role_ids: FrozenSet[int]
+    user_ids: FrozenSet[int]
+
+
+class ArchiveStats(NamedTuple):
+    """Размер рабочей базы и архива заявок."""
+    hot_applications: int
+    archived_applications: int
+    database_bytes: int
+    archive_bytes: int
+    free_bytes: int  # свободные страницы обоих файлов, возвращаются VACUUM
+
+
+APPLICATION_COLUMNS = _columns(Application)
+GUILD_SETTINGS_COLUMNS = _columns(GuildSettings)
@@ -0,0 +1,116 @@
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from config import (
+    SUBMIT_USER_BUCKET,
+    SUBMIT_GUILD_BUCKET,
+    SUBMIT_MAX_CONCURRENT,
+    ACTIVE_APPLICATION_CACHE_TTL,
+)
+
+
+class TokenBucket:
+    """Token bucket: capacity токенов, один токен восстанавливается за period секунд."""
+
+    __slots__ = ('capacity', 'period', 'tokens', 'updated')
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.period = period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.period)
+        self.updated = now
+
+    def consume(self, now: Optional[float] = None) -> bool:
+        """Забирает токен, если он есть."""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Через сколько секунд появится следующий токен."""
+        return max(0.0, (1 - self.tokens) * self.period)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class SubmissionGate:
+    """Допуск заявок до любой записи в базу и создания канала.
+
+    Проверки идут от дешевых к дорогим: лимит частоты пользователя и
+    гильдии, кэш активной заявки, общий лимит одновременных обработок.
+    """
+
+    # После скольких записей чистить полные (неиспользуемые) buckets
+    PRUNE_THRESHOLD = 10000
+
+    def __init__(self, max_concurrent: int = SUBMIT_MAX_CONCURRENT):
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self._user_buckets: Dict[Tuple[int, int], TokenBucket] = {}
+        self._guild_buckets: Dict[int, TokenBucket] = {}
+        self._active: Dict[Tuple[int, int], Tuple[bool, float]] = {}
+        self._in_flight_users: Set[Tuple[int, int]] = set()
+
+    def check_rate(self, guild_id: int, user_id: int) -> Optional[str]:
+        """Возвращает текст отказа, если превышен лимит частоты."""
+        now = time.monotonic()
+        if len(self._user_buckets) > self.PRUNE_THRESHOLD:
+            self._prune(now)
+
+        user_bucket = self._user_buckets.get((guild_id, user_id))
+        if user_bucket is None:
+            user_bucket = self._user_buckets[(guild_id, user_id)] = TokenBucket(*SUBMIT_USER_BUCKET)
+        guild_bucket = self._guild_buckets.get(guild_id)
+        if guild_bucket is None:
+            guild_bucket = self._guild_buckets[guild_id] = TokenBucket(*SUBMIT_GUILD_BUCKET)
+
+        if not user_bucket.consume(now):
+            return f"Вы слишком часто подаете заявки. Попробуйте через {int(user_bucket.retry_after()) + 1} с."
+        if not guild_bucket.consume(now):
+            return "Сейчас подается слишком много заявок. Попробуйте через минуту."
+        return None
+
+    async def has_active_application(self, guild_id: int, user_id: int) -> bool:
+        """Проверяет наличие активной заявки (с кэшем)."""
+        key = (guild_id, user_id)
+        if key in self._in_flight_users:
+            return True
+
+        cached = self._active.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        from database import db
+
+        active = await db.get_pending_application(guild_id, user_id) is not None
+        self._active[key] = (active, time.monotonic() + ACTIVE_APPLICATION_CACHE_TTL)
+        return active
+
+    def set_active(self, guild_id: int, user_id: int, active: bool) -> None:
+        """Обновляет кэш после создания заявки или решения по ней."""
+        self._active[(guild_id, user_id)] = (active, time.monotonic() + ACTIVE_APPLICATION_CACHE_TTL)
+
+    def try_enter(self, guild_id: int, user_id: int) -> bool:
+        """Занимает слот обработки заявки. False - лимит исчерпан."""
+        if self.in_flight >= self.max_concurrent:
+            return False
+        self.in_flight += 1
+        self._in_flight_users.add((guild_id, user_id))
+        return True
+
+    def leave(self, guild_id: int, user_id: int) -> None:
+        """Освобождает слот обработки заявки."""
+        self.in_flight -= 1
+        self._in_flight_users.discard((guild_id, user_id))
+
+    def _prune(self, now: float) -> None:
+        self._user_buckets = {key: bucket for key, bucket in self._user_buckets.items() if not bucket.is_full(now)}
+        self._active = {key: value for key, value in self._active.items() if value[1] > now}
@@ -0,0 +1,167 @@
+import discord
+from typing import Any, Dict, Optional
+
+from utils.fanout import add_thread_members
+from utils.jobs import JobQueue
+
+
+async def _resolve_member(bot, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    """Ищет участника в кэше, при промахе запрашивает у Discord."""
+    member = guild.get_member(user_id)
+    if member:
+        return member
+    try:
+        return await bot.rest.background(guild.fetch_member, user_id)
+    except discord.NotFound:
+        return None
+
+
+async def add_member_role(bot, guild: discord.Guild, payload: Dict[str, Any]):
+    """Выдает роль принятому участнику."""
+    role = guild.get_role(payload['role_id'])
+    member = await _resolve_member(bot, guild, payload['user_id'])
+    if role and member:
+        await bot.rest.channel(member.add_roles, role)
+
+
+async def _resolve_channel(bot, guild: discord.Guild, channel_id: int):
+    """Ищет канал или ветку в кэше, при промахе (архивная ветка) запрашивает у Discord."""
+    channel = guild.get_channel_or_thread(channel_id)
+    if channel:
+        return channel
+    try:
+        return await bot.rest.background(guild.fetch_channel, channel_id)
+    except discord.NotFound:
+        return None
+
+
+async def delete_application_channel(bot, guild: discord.Guild, payload: Dict[str, Any]):
+    """Удаляет канал или ветку заявки после решения."""
+    channel = await _resolve_channel(bot, guild, payload['channel_id'])
+    if channel:
+        try:
+            await bot.rest.background(channel.delete, reason=payload.get('reason'))
+        except discord.NotFound:
+            pass
+
+
+async def add_thread_moderators(bot, guild: discord.Guild, payload: Dict[str, Any]):
+    """Добавляет модераторов в ветку заявки (режим веток)."""
+    thread = await _resolve_channel(bot, guild, payload['thread_id'])
+    if isinstance(thread, discord.Thread):
+        await add_thread_members(bot.rest, thread, await bot.permissions.moderator_members(guild))
+
+
+async def create_member_thread(bot, guild: discord.Guild, payload: Dict[str, Any]):
+    """Создает ветку принятого участника и добавляет в неё модераторов.
+
+    Повторный запуск не создает вторую ветку: ID ветки сохраняется сразу
+    после создания и переиспользуется. Если сохранить ID не удалось, ветка
+    удаляется, и повтор задачи создаст её заново.
+    """
+    from database import db
+
+    branch_channel = guild.get_channel(payload['branch_channel_id'])
+    applicant = await _resolve_member(bot, guild, payload['user_id'])
+    if not branch_channel or not applicant:
+        return
+
+    application = await db.get_application(payload['application_id'])
+    thread = None
+    if application and application.member_thread_id:
+        thread = await _resolve_channel(bot, guild, application.member_thread_id)
+        if not isinstance(thread, discord.Thread):
+            thread = None
+
+    if thread is None:
+        thread = await bot.rest.channel(
+            branch_channel.create_thread,
+            name=f"{applicant.name}",
+            type=discord.ChannelType.private_thread,
+            reason=f"Ветка для принятого участника {applicant.name}"
+        )
+        try:
+            await db.update_application(payload['application_id'], member_thread_id=thread.id)
+        except Exception:
+            # Иначе повтор задачи не узнает об этой ветке и создаст вторую
+            try:
+                await bot.rest.background(thread.delete)
+            except discord.HTTPException as e:
+                print(f"[-] Не удалось удалить ветку {thread.id} без сохраненного ID: {e}")
+            raise
+
+    # Заявителя добавляем отдельно: ошибка здесь должна привести к повтору задачи
+    await bot.rest.channel(thread.add_user, applicant)
+
+    moderators = await bot.permissions.moderator_members(guild)
+    await add_thread_members(bot.rest, thread, (member for member in moderators if member.id != applicant.id))
+
+    await bot.rest.channel(thread.send, f"Добро пожаловать, {applicant.mention}! Ваша заявка была принята.")
+
+
+async def notify_applicant(bot, guild: discord.Guild, payload: Dict[str, Any]):
+    """Отправляет заявителю личное сообщение о событии по заявке.
+
+    Отправка идет через bot.dm: события одного заявителя объединяются,
+    а закрытые личные сообщения не запрашиваются повторно.
+    """
+    from utils.embeds import create_applicant_dm_embed
+
+    applicant = await _resolve_member(bot, guild, payload['user_id'])
+    if not applicant:
+        return
+
+    embed = create_applicant_dm_embed(
+        event=payload['event'],
+        guild_id=guild.id,
+        clan_name=payload['clan_name'],
+        timestamp=payload['timestamp'],
+        reason=payload.get('reason'),
+        jump_url=payload.get('jump_url'),
+        voice_channel_id=payload.get('voice_channel_id')
+    )
+
+    await bot.dm.send(applicant.id, embed)
+
+
+async def send_application_log(bot, guild: discord.Guild, payload: Dict[str, Any]):
+    """Отправляет лог решения по заявке пакетом и ждет доставки (ошибка - повтор задачи)."""
+    from database import db
+    from utils.embeds import send_log
+
+    application = await db.get_application(payload['application_id'])
+    moderator = await _resolve_member(bot, guild, payload['moderator_id'])
+    if not application or not moderator:
+        return
+
+    await send_log(
+        guild=guild,
+        application=application,
+        moderator=moderator,
+        applicant=guild.get_member(application.user_id),
+        action=payload['action'],
+        reason=payload.get('reason'),
+        dispatcher=bot.logs
+    )
+
+
+async def call_notice(bot, guild: discord.Guild, payload: Dict[str, Any]):
+    """Сообщает в канале заявки о вызове на обзвон."""
+    channel = guild.get_channel_or_thread(payload['channel_id'])
+    if channel:
+        await bot.rest.channel(
+            channel.send,
+            f"<@{payload['moderator_id']}> вызвал на обзвон <@{payload['user_id']}>\n"
+            f"Зайдите в голосовой канал <#{payload['voice_channel_id']}>"
+        )
+
+
+def register_application_jobs(queue: JobQueue) -> None:
+    """Регистрирует обработчики побочных действий по заявкам."""
+    queue.handler('add_member_role')(add_member_role)
+    queue.handler('delete_application_channel')(delete_application_channel)
+    queue.handler('add_thread_moderators')(add_thread_moderators)
+    queue.handler('create_member_thread')(create_member_thread)
+    queue.handler('notify_applicant')(notify_applicant)
+    queue.handler('send_application_log')(send_application_log)
+    queue.handler('call_notice')(call_notice)
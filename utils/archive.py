@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from config import ARCHIVE_BATCH_PAUSE, ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL, ARCHIVE_RETENTION_DAYS
+
+
+class ApplicationArchiver:
+    """Фоновый перенос решенных заявок в архив.
+
+    Раз в ARCHIVE_INTERVAL секунд заявки, по которым решение принято больше
+    ARCHIVE_RETENTION_DAYS дней назад, переносятся пакетами по
+    ARCHIVE_BATCH_SIZE в файл архива. Между пакетами делается пауза, чтобы
+    блокировка записи не задерживала обработку новых заявок.
+    """
+
+    def __init__(self, bot, retention_days: int = ARCHIVE_RETENTION_DAYS):
+        self.bot = bot
+        self.retention_days = retention_days
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def start(self) -> None:
+        """Запускает периодическую архивацию."""
+        # Архив общий для всех кластеров, достаточно одного процесса
+        if self.retention_days <= 0 or self.bot.cluster_id not in (None, 0):
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+
+        while not self.bot.is_closed():
+            try:
+                archived = await self.archive()
+                if archived:
+                    print(f"[+] Перенесено в архив заявок: {archived}")
+            except Exception as e:
+                print(f"[-] Ошибка архивации заявок: {e}")
+            await asyncio.sleep(ARCHIVE_INTERVAL)
+
+    async def archive(self) -> int:
+        """Переносит в архив все заявки старше срока хранения, возвращает их число."""
+        from database import db
+
+        if self.retention_days <= 0:
+            return 0
+
+        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        total = 0
+
+        # Ручной запуск командой не должен идти параллельно с фоновым
+        async with self._lock:
+            while True:
+                archived = await db.archive_applications(cutoff, ARCHIVE_BATCH_SIZE)
+                total += archived
+                if archived < ARCHIVE_BATCH_SIZE:
+                    return total
+                await asyncio.sleep(ARCHIVE_BATCH_PAUSE)
@@ -0,0 +1,230 @@
+import asyncio
+import discord
+from typing import Dict, List, Optional, Set
+
+from config import CHANNEL_POOL_NAME
+from models import GuildSettings
+
+
+class ChannelPool:
+    """Пул заранее созданных скрытых каналов заявок.
+
+    При подаче заявки канал берется из пула, переименовывается и получает
+    права доступа одним запросом вместо создания нового канала. Фоновый
+    процесс досоздает каналы до размера channel_pool_size из настроек.
+    При запуске устаревшие и потерянные каналы пула удаляются.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._pending: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запускает фоновое пополнение пула (после готовности бота)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def request_refill(self, guild_id: int) -> None:
+        """Просит пополнить пул гильдии."""
+        self._pending.add(guild_id)
+        self._wakeup.set()
+
+    async def claim(
+        self,
+        guild: discord.Guild,
+        category: discord.CategoryChannel,
+        name: str,
+        overwrites: Dict,
+        reason: Optional[str] = None
+    ) -> Optional[discord.TextChannel]:
+        """Берет канал из пула и превращает его в канал заявки.
+
+        Возвращает None, если в пуле нет подходящих каналов.
+        """
+        from database import db
+
+        while True:
+            channel_id = await db.claim_pooled_channel(guild.id, category.id)
+            if channel_id is None:
+                return None
+
+            self.request_refill(guild.id)
+
+            channel = guild.get_channel(channel_id)
+            if not isinstance(channel, discord.TextChannel) or channel.category_id != category.id:
+                continue
+
+            try:
+                return await self.bot.rest.channel(channel.edit, name=name, overwrites=overwrites, reason=reason)
+            except discord.NotFound:
+                continue
+            except discord.HTTPException:
+                await self._delete(channel)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+
+        try:
+            await self.reclaim()
+        except Exception as e:
+            print(f"[-] Ошибка очистки пула каналов: {e}")
+
+        for guild in self.bot.guilds:
+            self._pending.add(guild.id)
+        self._wakeup.set()
+
+        while not self.bot.is_closed():
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self._pending:
+                guild_id = self._pending.pop()
+                try:
+                    await self.refill(guild_id)
+                except Exception as e:
+                    print(f"[-] Ошибка пополнения пула каналов: {e}")
+
+    async def refill(self, guild_id: int) -> int:
+        """Досоздает каналы пула гильдии до целевого размера."""
+        from database import db
+
+        guild = self.bot.get_guild(guild_id)
+        guild_settings = await db.get_guild_settings(guild_id)
+        if not guild or not guild_settings:
+            return 0
+
+        if guild_settings.thread_mode:
+            # Заявки создаются ветками, каналы пула не понадобятся
+            await self.drain(guild)
+            return 0
+
+        target = _target_size(guild_settings)
+        category = guild.get_channel(guild_settings.applications_category_id or 0)
+        if target <= 0 or not isinstance(category, discord.CategoryChannel):
+            return 0
+
+        pooled = [
+            row for row in await db.get_pooled_channels(guild_id)
+            if row['category_id'] == category.id
+        ]
+
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            guild.me: discord.PermissionOverwrite(
+                view_channel=True,
+                send_messages=True,
+                manage_channels=True,
+                read_message_history=True
+            )
+        }
+
+        created = 0
+        for _ in range(target - len(pooled)):
+            channel = await self.bot.rest.background(
+                guild.create_text_channel,
+                name=CHANNEL_POOL_NAME,
+                category=category,
+                overwrites=overwrites,
+                reason="Резервный канал для заявок"
+            )
+            await db.add_pooled_channel(channel.id, guild.id, category.id)
+            created += 1
+
+        if created:
+            print(f"[+] Пул каналов {guild.name}: создано {created}, всего {target}")
+        return created
+
+    async def reclaim(self) -> int:
+        """Удаляет устаревшие каналы пула.
+
+        Удаляются записи о пропавших каналах, каналы из старой категории или
+        сверх целевого размера, а также каналы пула без записи в базе
+        (созданные перед аварийной остановкой).
+        """
+        from database import db
+
+        rows = await db.get_pooled_channels()
+        removed_ids: List[int] = []
+        known_ids = set()
+        kept: Dict[int, int] = {}
+        deleted = 0
+
+        for row in rows:
+            guild = self.bot.get_guild(row['guild_id'])
+            if guild is None:
+                continue  # Гильдия другого кластера или бот покинул сервер
+
+            known_ids.add(row['channel_id'])
+            channel = guild.get_channel(row['channel_id'])
+            if channel is None:
+                removed_ids.append(row['channel_id'])
+                continue
+
+            guild_settings = await db.get_guild_settings(guild.id) or GuildSettings(guild.id)
+            target = _target_size(guild_settings)
+            category_id = guild_settings.applications_category_id
+            if row['category_id'] != category_id or kept.get(guild.id, 0) >= target:
+                removed_ids.append(row['channel_id'])
+                deleted += await self._delete(channel)
+                continue
+
+            kept[guild.id] = kept.get(guild.id, 0) + 1
+
+        # Каналы пула в категории заявок, о которых база не знает
+        for guild in self.bot.guilds:
+            guild_settings = await db.get_guild_settings(guild.id) or GuildSettings(guild.id)
+            category = guild.get_channel(guild_settings.applications_category_id or 0)
+            if not isinstance(category, discord.CategoryChannel):
+                continue
+            for channel in category.text_channels:
+                if channel.name == CHANNEL_POOL_NAME and channel.id not in known_ids:
+                    deleted += await self._delete(channel)
+
+        await db.remove_pooled_channels(removed_ids)
+
+        if removed_ids or deleted:
+            print(f"[+] Пул каналов: удалено записей {len(removed_ids)}, каналов {deleted}")
+        return deleted
+
+    async def drain(self, guild: discord.Guild) -> int:
+        """Удаляет все каналы пула гильдии (например, после перехода на ветки)."""
+        from database import db
+
+        rows = await db.get_pooled_channels(guild.id)
+        if not rows:
+            return 0
+
+        deleted = 0
+        for row in rows:
+            channel = guild.get_channel(row['channel_id'])
+            if channel is not None:
+                deleted += await self._delete(channel)
+
+        await db.remove_pooled_channels([row['channel_id'] for row in rows])
+        print(f"[+] Пул каналов {guild.name}: удалено каналов {deleted}, заявки создаются ветками")
+        return deleted
+
+    async def _delete(self, channel: discord.abc.GuildChannel) -> int:
+        try:
+            await self.bot.rest.background(channel.delete, reason="Очистка пула каналов заявок")
+            return 1
+        except discord.NotFound:
+            return 0
+        except discord.HTTPException as e:
+            print(f"[-] Не удалось удалить канал пула {channel.id}: {e}")
+            return 0
+
+
+def _target_size(guild_settings: GuildSettings) -> int:
+    """Целевой размер пула: в режиме веток каналы не используются."""
+    if guild_settings.thread_mode:
+        return 0
+    return guild_settings.channel_pool_size or 0
@@ -0,0 +1,161 @@
+import asyncio
+import time
+import discord
+from typing import Dict, List, Optional
+
+from config import (
+    DM_WORKERS,
+    DM_COALESCE_DELAY,
+    DM_MAX_ATTEMPTS,
+    DM_RETRY_DELAY,
+    DM_CLOSED_TTL,
+)
+
+# Максимум embed в одном сообщении Discord
+MAX_EMBEDS = 10
+
+
+class _PendingMessage:
+    """Накопленные для пользователя embed и ожидающие их отправки."""
+    __slots__ = ('embeds', 'waiters')
+
+    def __init__(self):
+        self.embeds: List[discord.Embed] = []
+        self.waiters: List[asyncio.Future] = []
+
+
+class DirectMessageService:
+    """Очередь личных сообщений заявителям.
+
+    События по одному пользователю, пришедшие в течение DM_COALESCE_DELAY,
+    отправляются одним сообщением. Временные ошибки повторяются с
+    задержкой, а пользователи с закрытыми личными сообщениями запоминаются
+    на DM_CLOSED_TTL секунд, и сообщения им не отправляются вовсе.
+    """
+
+    def __init__(self, bot, workers: int = DM_WORKERS):
+        self.bot = bot
+        self.workers = workers
+        self._pending: Dict[int, _PendingMessage] = {}
+        self._closed: Dict[int, float] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.sent = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        # Незавершенные отправки будут повторены очередью задач после перезапуска
+        for pending in self._pending.values():
+            for waiter in pending.waiters:
+                waiter.cancel()
+        self._pending.clear()
+
+    def dms_closed(self, user_id: int) -> bool:
+        """Закрыты ли у пользователя личные сообщения (по последней попытке)."""
+        closed_at = self._closed.get(user_id)
+        if closed_at is None:
+            return False
+        if time.monotonic() - closed_at > DM_CLOSED_TTL:
+            del self._closed[user_id]
+            return False
+        return True
+
+    def send(self, user_id: int, embed: discord.Embed) -> asyncio.Future:
+        """Ставит embed в очередь пользователя.
+
+        Возвращает future: True - сообщение доставлено, False - пропущено
+        (личные сообщения закрыты). После исчерпания попыток future
+        завершается исключением.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        if self.dms_closed(user_id):
+            self.skipped += 1
+            waiter.set_result(False)
+            return waiter
+
+        pending = self._pending.get(user_id)
+        if pending is None or len(pending.embeds) >= MAX_EMBEDS:
+            pending = _PendingMessage()
+            self._pending[user_id] = pending
+            asyncio.get_running_loop().call_later(
+                DM_COALESCE_DELAY, self._queue.put_nowait, (user_id, pending)
+            )
+
+        pending.embeds.append(embed)
+        pending.waiters.append(waiter)
+        return waiter
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'sent': self.sent,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'queued': sum(len(pending.embeds) for pending in self._pending.values()),
+            'closed_cached': len(self._closed),
+        }
+
+    async def _worker(self):
+        while True:
+            user_id, pending = await self._queue.get()
+            # Новые события пользователя пойдут уже следующим сообщением
+            if self._pending.get(user_id) is pending:
+                del self._pending[user_id]
+
+            try:
+                result = await self._deliver(user_id, pending.embeds)
+            except Exception as e:
+                self.failed += len(pending.embeds)
+                print(f"[-] Не удалось отправить личное сообщение {user_id}: {e}")
+                for waiter in pending.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                continue
+
+            for waiter in pending.waiters:
+                if not waiter.done():
+                    waiter.set_result(result)
+
+    async def _deliver(self, user_id: int, embeds: List[discord.Embed]) -> bool:
+        if self.dms_closed(user_id):
+            self.skipped += len(embeds)
+            return False
+
+        user = await self._resolve_user(user_id)
+        if user is None:
+            self.skipped += len(embeds)
+            return False
+
+        for attempt in range(1, DM_MAX_ATTEMPTS + 1):
+            try:
+                await self.bot.rest.background(user.send, embeds=embeds)
+                self.sent += len(embeds)
+                return True
+            except discord.Forbidden:
+                self._closed[user_id] = time.monotonic()
+                self.skipped += len(embeds)
+                return False
+            except discord.HTTPException as e:
+                # Ошибки запроса (4xx) повтором не исправить
+                if e.status < 500 or attempt == DM_MAX_ATTEMPTS:
+                    raise
+            await asyncio.sleep(DM_RETRY_DELAY * 2 ** (attempt - 1))
+        return False
+
+    async def _resolve_user(self, user_id: int) -> Optional[discord.User]:
+        user = self.bot.get_user(user_id)
+        if user:
+            return user
+        try:
+            return await self.bot.rest.background(self.bot.fetch_user, user_id)
+        except discord.NotFound:
+            return None
@@ -1,11 +1,16 @@
 import discord
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional
+
+from models import Application
 
 # Цвета для логов
 LOG_COLOR_ACCEPTED = 0x00FF00  # Ярко-зеленый
 LOG_COLOR_REJECTED = 0xFF0000  # Ярко-красный
 
+# Ярко-зеленый цвет для всех DM сообщений
+BRIGHT_GREEN = 0x00FF00
+
 
 def create_application_embed(
     user: discord.Member,
@@ -42,8 +47,72 @@ def create_application_embed(
     return embed
 
 
+def create_applicant_dm_embed(
+    event: str,
+    guild_id: int,
+    clan_name: str,
+    timestamp: int,
+    reason: Optional[str] = None,
+    jump_url: Optional[str] = None,
+    voice_channel_id: Optional[int] = None
+) -> discord.Embed:
+    """Создает embed для личного сообщения заявителю.
+
+    Args:
+        event: 'accepted', 'rejected', 'reviewing' или 'call'
+        guild_id: ID сервера
+        clan_name: Название клана
+        timestamp: Время события (unix)
+        reason: Причина отклонения (только для rejected)
+        jump_url: Ссылка на заявку (только для reviewing)
+        voice_channel_id: Голосовой канал (только для call)
+    """
+    if event == 'accepted':
+        embed = discord.Embed(
+            title="Принятие заявки.",
+            description=f"Ваша заявка в {clan_name} **принята**!",
+            color=BRIGHT_GREEN
+        )
+        date_label = "Дата принятия:"
+    elif event == 'rejected':
+        embed = discord.Embed(
+            title="Отклонение заявки",
+            description=f"Ваша заявка в {clan_name} **отклонена**!",
+            color=BRIGHT_GREEN
+        )
+        if reason:
+            embed.add_field(name="Причина:", value=reason, inline=False)
+        date_label = "Дата отклонения:"
+    elif event == 'reviewing':
+        embed = discord.Embed(
+            title="Рассмотрение заявки.",
+            description=f"Ваша заявка в {clan_name} **взята на рассмотрение**!",
+            color=BRIGHT_GREEN
+        )
+        if jump_url:
+            embed.add_field(name="Ссылка на заявку:", value=f"[{clan_name}]({jump_url})", inline=False)
+        date_label = "Дата события:"
+    else:
+        embed = discord.Embed(
+            title="Приглашение на обзвон",
+            description="Вы были вызваны на **обзвон**!",
+            color=BRIGHT_GREEN
+        )
+        embed.add_field(
+            name="",
+            value=f"Вас приглашают присоединиться к голосовому каналу: **{clan_name}**\n<#{voice_channel_id}>",
+            inline=False
+        )
+        date_label = "Дата события:"
+
+    embed.add_field(name="ID Дискорд сервера:", value=str(guild_id), inline=False)
+    embed.add_field(name=date_label, value=f"<t:{timestamp}:R>", inline=False)
+
+    return embed
+
+
 def create_log_embed(
-    application: Dict[str, Any],
+    application: Application,
     moderator: discord.Member,
     applicant: discord.Member,
     action: str,
@@ -69,22 +138,22 @@ def create_log_embed(
     embed.title = "Заявление"
 
     # Поля заявки
-    embed.add_field(name="#Статик", value=application.get('static', 'Не указано'), inline=False)
-    embed.add_field(name="Сколько часов в день играешь?", value=application.get('hours_per_day', 'Не указано'), inline=False)
-    embed.add_field(name="Возраст ООС", value=f"Мне {application.get('age_oos', 'Не указано')}", inline=False)
+    embed.add_field(name="#Статик", value=application.static or 'Не указано', inline=False)
+    embed.add_field(name="Сколько часов в день играешь?", value=application.hours_per_day or 'Не указано', inline=False)
+    embed.add_field(name="Возраст ООС", value=f"Мне {application.age_oos or 'Не указано'}", inline=False)
 
-    if application.get('how_found'):
-        embed.add_field(name="Как узнали о семье", value=application.get('how_found'), inline=False)
+    if application.how_found:
+        embed.add_field(name="Как узнали о семье", value=application.how_found, inline=False)
 
-    embed.add_field(name="Готовы онлайнить?", value=application.get('ready_online', 'Не указано'), inline=False)
+    embed.add_field(name="Готовы онлайнить?", value=application.ready_online or 'Не указано', inline=False)
 
     # Разделитель
     embed.add_field(name="\u200b", value="\u200b", inline=False)
 
     # Информация о пользователе
-    embed.add_field(name="Пользователь", value=f"@{applicant.name}" if applicant else f"@{application.get('username', 'Unknown')}", inline=True)
-    embed.add_field(name="Username", value=application.get('username', 'Unknown'), inline=True)
-    embed.add_field(name="ID", value=str(application.get('user_id', 'Unknown')), inline=True)
+    embed.add_field(name="Пользователь", value=f"@{applicant.name}" if applicant else f"@{application.username or 'Unknown'}", inline=True)
+    embed.add_field(name="Username", value=application.username or 'Unknown', inline=True)
+    embed.add_field(name="ID", value=str(application.user_id), inline=True)
 
     # Разделитель
     embed.add_field(name="\u200b", value="\u200b", inline=False)
@@ -93,7 +162,7 @@ def create_log_embed(
     if is_accepted:
         embed.add_field(
             name="Кого",
-            value=applicant.mention if applicant else f"<@{application.get('user_id')}>",
+            value=applicant.mention if applicant else f"<@{application.user_id}>",
             inline=True
         )
         embed.add_field(
@@ -104,7 +173,7 @@ def create_log_embed(
     else:
         embed.add_field(
             name="Кого",
-            value=applicant.mention if applicant else f"<@{application.get('user_id')}>",
+            value=applicant.mention if applicant else f"<@{application.user_id}>",
             inline=True
         )
         embed.add_field(
@@ -115,9 +184,9 @@ def create_log_embed(
 
     # Текст внизу
     if is_accepted:
-        footer_text = f"{moderator.display_name} рассмотрел заявку и принял {applicant.display_name if applicant else application.get('username', 'Unknown')}"
+        footer_text = f"{moderator.display_name} рассмотрел заявку и принял {applicant.display_name if applicant else application.username or 'Unknown'}"
     else:
-        footer_text = f"{moderator.display_name} рассмотрел заявку и отклонил {applicant.display_name if applicant else application.get('username', 'Unknown')}"
+        footer_text = f"{moderator.display_name} рассмотрел заявку и отклонил {applicant.display_name if applicant else application.username or 'Unknown'}"
 
     embed.set_footer(text=footer_text)
 
@@ -131,24 +200,30 @@ def create_log_embed(
 
 async def send_log(
     guild: discord.Guild,
-    application: Dict[str, Any],
+    application: Application,
     moderator: discord.Member,
     applicant: discord.Member,
     action: str,
-    reason: Optional[str] = None
+    reason: Optional[str] = None,
+    dispatcher=None
 ) -> bool:
     """Отправляет лог в канал логов.
 
+    Если передан dispatcher (LogDispatcher), лог уходит пакетной отправкой,
+    и функция ждет, пока пакет будет действительно отправлен; ошибки
+    отправки пробрасываются вызывающему. Иначе лог отправляется отдельным
+    сообщением.
+
     Returns:
-        True если лог отправлен, False если канал не настроен
+        True если лог отправлен, False если канал не настроен или недоступен
     """
-    from database import get_guild_settings
+    from database import db
 
-    guild_settings = get_guild_settings(guild.id)
+    guild_settings = await db.get_guild_settings(guild.id)
     if not guild_settings:
         return False
 
-    logs_channel_id = guild_settings.get('logs_channel_id')
+    logs_channel_id = guild_settings.logs_channel_id
     if not logs_channel_id:
         return False
 
@@ -158,6 +233,9 @@ async def send_log(
 
     embed = create_log_embed(application, moderator, applicant, action, reason)
 
+    if dispatcher is not None:
+        return await dispatcher.send(logs_channel, embed)
+
     try:
         await logs_channel.send(embed=embed)
         return True
@@ -0,0 +1,55 @@
+import asyncio
+import time
+import discord
+from typing import Iterable, NamedTuple
+
+from config import THREAD_FANOUT_CONCURRENCY
+from utils.rest import RestScheduler
+
+
+class FanoutResult(NamedTuple):
+    """Итог добавления участников в ветку."""
+    added: int
+    failed: int
+    elapsed_ms: float
+
+
+async def add_thread_members(
+    rest: RestScheduler,
+    thread: discord.Thread,
+    members: Iterable[discord.abc.Snowflake],
+    concurrency: int = THREAD_FANOUT_CONCURRENCY
+) -> FanoutResult:
+    """Добавляет участников в ветку параллельно.
+
+    Повторы (участник и по роли, и напрямую) отбрасываются по ID. Число
+    одновременных запросов ограничено concurrency: все запросы попадают
+    в один bucket маршрута ветки, а ответы 429 discord.py сам дожидается
+    и повторяет, так что лимит лишь не дает сжечь bucket одним рывком.
+    Запросы идут фоновым классом rest и уступают ответам на взаимодействия.
+    """
+    unique = {member.id: member for member in members}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+
+    async def add(member) -> bool:
+        async with semaphore:
+            try:
+                await rest.background(thread.add_user, member)
+                return True
+            except discord.HTTPException:
+                return False
+
+    results = await asyncio.gather(*(add(member) for member in unique.values()))
+
+    added = sum(results)
+    result = FanoutResult(
+        added=added,
+        failed=len(results) - added,
+        elapsed_ms=(time.perf_counter() - started) * 1000
+    )
+    print(
+        f"[+] Ветка {thread.name}: добавлено {result.added} из {len(results)} "
+        f"участников за {result.elapsed_ms:.0f} мс"
+    )
+    return result
@@ -0,0 +1,159 @@
+import asyncio
+import functools
+import time
+import discord
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import INTERACTION_DEADLINE, INTERACTION_DEFER_MARGIN, INTERACTION_NEAR_MISS
+
+# Границы корзин гистограммы времени ответа (секунды)
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0)
+
+
+def _lock(interaction: discord.Interaction) -> asyncio.Lock:
+    return interaction.extras.setdefault('response_lock', asyncio.Lock())
+
+
+def _mark_responded(interaction: discord.Interaction) -> None:
+    interaction.extras.setdefault('responded_at', time.monotonic())
+
+
+async def respond(interaction: discord.Interaction, content: Optional[str] = None, **kwargs) -> None:
+    """Отвечает на взаимодействие или, если ответ уже был (например, defer), шлет followup."""
+    rest = interaction.client.rest
+    async with _lock(interaction):
+        if interaction.response.is_done():
+            await rest.interactive(interaction.followup.send, content, **kwargs)
+        else:
+            await rest.interactive(interaction.response.send_message, content, **kwargs)
+            _mark_responded(interaction)
+
+
+async def defer(interaction: discord.Interaction, **kwargs) -> None:
+    """Откладывает ответ, если на взаимодействие еще не ответили."""
+    async with _lock(interaction):
+        if not interaction.response.is_done():
+            await interaction.client.rest.interactive(interaction.response.defer, **kwargs)
+            _mark_responded(interaction)
+
+
+async def send_modal(interaction: discord.Interaction, modal: discord.ui.Modal) -> None:
+    """Открывает модальное окно (возможно только первым ответом)."""
+    async with _lock(interaction):
+        await interaction.client.rest.interactive(interaction.response.send_modal, modal)
+        _mark_responded(interaction)
+
+
+class _HandlerStats:
+    __slots__ = ('count', 'buckets', 'near_misses', 'auto_defers')
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.near_misses = 0
+        self.auto_defers = 0
+
+
+class InteractionMonitor:
+    """Контроль срока ответа на взаимодействия.
+
+    Обработчик кнопок, меню и модальных окон запускается через run: если
+    за INTERACTION_DEFER_MARGIN до трехсекундного срока ответа еще нет,
+    монитор сам отвечает defer, а ответ обработчика через respond уходит
+    followup-сообщением. Для каждого обработчика собирается гистограмма
+    времени первого ответа и число почти опоздавших ответов.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, _HandlerStats] = {}
+
+    async def run(
+        self,
+        name: str,
+        interaction: discord.Interaction,
+        callback: Callable[[], Awaitable[Any]],
+        auto_defer: bool = True
+    ) -> Any:
+        """Выполняет callback() с отслеживанием срока ответа.
+
+        auto_defer=False для обработчиков, которые открывают модальное окно:
+        после defer его открыть уже нельзя.
+        """
+        started = time.monotonic()
+        # Часть срока уже ушла на доставку события через gateway
+        age = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        deadline = started + INTERACTION_DEADLINE - min(max(age, 0.0), INTERACTION_DEADLINE)
+        stats = self._stats.setdefault(name, _HandlerStats())
+
+        timer = None
+        if auto_defer:
+            timer = asyncio.create_task(self._defer_before(interaction, deadline, stats))
+
+        try:
+            return await callback()
+        finally:
+            if timer is not None:
+                if _lock(interaction).locked() and not timer.done():
+                    await timer  # defer уже отправляется, не обрываем запрос
+                else:
+                    timer.cancel()
+            self._record(interaction, started, deadline, stats)
+
+    async def _defer_before(self, interaction: discord.Interaction, deadline: float, stats: _HandlerStats):
+        await asyncio.sleep(max(0.0, deadline - INTERACTION_DEFER_MARGIN - time.monotonic()))
+        if interaction.response.is_done():
+            return
+        try:
+            await defer(interaction)
+        except discord.HTTPException as e:
+            print(f"[-] Не удалось автоматически отложить ответ: {e}")
+            return
+        stats.auto_defers += 1
+
+    def _record(self, interaction: discord.Interaction, started: float, deadline: float, stats: _HandlerStats):
+        responded_at = interaction.extras.get('responded_at')
+        if responded_at is None:
+            return
+
+        latency = responded_at - started
+        stats.count += 1
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                stats.buckets[index] += 1
+                break
+        else:
+            stats.buckets[-1] += 1
+
+        if deadline - responded_at < INTERACTION_NEAR_MISS:
+            stats.near_misses += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Гистограммы времени ответа, почти опоздавшие и автоматические defer по обработчикам."""
+        labels = [f"<={bound:g}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]:g}s"]
+        return {
+            name: {
+                'count': stats.count,
+                'histogram': dict(zip(labels, stats.buckets)),
+                'near_misses': stats.near_misses,
+                'auto_defers': stats.auto_defers,
+            }
+            for name, stats in self._stats.items()
+        }
+
+
+def monitored(auto_defer: bool = True):
+    """Декоратор обработчиков View и Modal: запускает их через bot.interactions.
+
+    Ставится под @ui.button / @ui.select; interaction - первый аргумент после self.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            return await interaction.client.interactions.run(
+                func.__qualname__,
+                interaction,
+                lambda: func(self, interaction, *args, **kwargs),
+                auto_defer=auto_defer
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,173 @@
+import asyncio
+import time
+import traceback
+import discord
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from config import (
+    JOB_WORKERS,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_DELAY,
+    JOB_RETRY_MAX_DELAY,
+    JOB_POLL_INTERVAL,
+)
+
+# Обработчик задачи: (bot, guild, payload)
+JobHandler = Callable[[Any, discord.Guild, Dict[str, Any]], Awaitable[None]]
+
+# Ошибки, которые не исправятся повтором
+PERMANENT_ERRORS = (discord.Forbidden, discord.NotFound)
+
+
+class JobQueue:
+    """Персистентная очередь фоновых задач в SQLite.
+
+    Задачи переживают перезапуск бота: при старте прерванные задачи
+    возвращаются в очередь. Ошибка обработчика приводит к повтору
+    с экспоненциальной задержкой, после JOB_MAX_ATTEMPTS попыток
+    (или сразу при Forbidden/NotFound) задача переносится в dead_jobs.
+    """
+
+    def __init__(self, bot, workers: int = JOB_WORKERS):
+        self.bot = bot
+        self.workers = workers
+        self._handlers: Dict[str, JobHandler] = {}
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def handler(self, kind: str):
+        """Декоратор регистрации обработчика задач типа kind."""
+        def decorator(func: JobHandler) -> JobHandler:
+            self._handlers[kind] = func
+            return func
+        return decorator
+
+    @property
+    def _shards(self):
+        return self.bot.shard_count, self.bot.shard_ids
+
+    async def enqueue(self, guild_id: int, jobs: Sequence):
+        """Ставит задачи (kind, payload) в очередь и будит воркеры."""
+        from database import db
+
+        if not jobs:
+            return
+        await db.enqueue_jobs(guild_id, jobs)
+        self._wakeup.set()
+
+    async def record_decision(
+        self,
+        application_id: int,
+        guild_id: int,
+        jobs: Sequence,
+        expected_status: Optional[Sequence[str]] = None,
+        **fields
+    ) -> bool:
+        """Сохраняет решение по заявке вместе с его побочными задачами.
+
+        Возвращает False, если заявка уже не в статусе expected_status
+        (решение принял кто-то другой) - тогда ничего не меняется.
+        """
+        from database import db
+
+        recorded = await db.update_application_and_enqueue(
+            application_id, guild_id, jobs, expected_status, **fields
+        )
+        if recorded:
+            self._wakeup.set()
+        return recorded
+
+    def start(self) -> None:
+        """Запускает воркеры (они ждут готовности бота)."""
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._run()))
+
+    async def _run(self):
+        from database import db
+
+        await self.bot.wait_until_ready()
+
+        restored = await db.reset_running_jobs(*self._shards)
+        if restored:
+            print(f"[+] Возвращено в очередь {restored} прерванных задач")
+
+        self._tasks.extend(asyncio.create_task(self._worker()) for _ in range(self.workers))
+
+    async def _worker(self):
+        from database import db
+
+        while not self.bot.is_closed():
+            try:
+                job = await db.claim_job(*self._shards)
+            except Exception as e:
+                print(f"[-] Ошибка чтения очереди задач: {e}")
+                job = None
+
+            if job is None:
+                await self._wait_for_work()
+                continue
+
+            # Ошибка записи результата (например, база занята) не должна останавливать воркер:
+            # задача останется в 'running' и вернется в очередь через reset_running_jobs
+            try:
+                await self._execute(job)
+            except Exception as e:
+                print(f"[-] Ошибка выполнения задачи {job['kind']} #{job['id']}: {e}")
+
+    async def _wait_for_work(self):
+        from database import db
+
+        timeout = JOB_POLL_INTERVAL
+        try:
+            next_run = await db.next_job_time(*self._shards)
+        except Exception:
+            next_run = None
+        if next_run is not None:
+            timeout = min(timeout, max(0.0, next_run - time.time()))
+
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _execute(self, job: Dict[str, Any]):
+        from database import db
+
+        kind = job['kind']
+        handler = self._handlers.get(kind)
+        if handler is None:
+            await db.bury_job(job['id'], f"Нет обработчика для задачи {kind}")
+            return
+
+        guild = self.bot.get_guild(job['guild_id'])
+        if guild is None:
+            # Бот больше не на сервере - выполнять нечего
+            await db.complete_job(job['id'])
+            return
+        if guild.unavailable:
+            await db.retry_job(job['id'], time.time() + JOB_RETRY_BASE_DELAY, "Сервер недоступен")
+            return
+
+        try:
+            await handler(self.bot, guild, job['payload'])
+        except Exception as e:
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            if isinstance(e, PERMANENT_ERRORS) or job['attempts'] >= JOB_MAX_ATTEMPTS:
+                await db.bury_job(job['id'], error)
+                print(f"[-] Задача {kind} #{job['id']} перенесена в dead_jobs: {error}")
+            else:
+                delay = min(JOB_RETRY_BASE_DELAY * 2 ** (job['attempts'] - 1), JOB_RETRY_MAX_DELAY)
+                await db.retry_job(job['id'], time.time() + delay, error)
+                print(f"[-] Задача {kind} #{job['id']} завершилась ошибкой, повтор через {delay:.0f} с: {error}")
+            return
+
+        await db.complete_job(job['id'])
+
+    async def close(self):
+        """Останавливает воркеры. Незавершенные задачи выполнятся после перезапуска."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,173 @@
+import asyncio
+import discord
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from config import (
+    LOG_FLUSH_INTERVAL,
+    LOG_BATCH_SIZE,
+    LOG_BUFFER_LIMIT,
+    LOG_USE_WEBHOOKS,
+    LOG_WEBHOOK_NAME,
+)
+
+
+# Запись буфера: (ID канала логов, embed, future доставки)
+LogEntry = Tuple[int, discord.Embed, asyncio.Future]
+
+
+class LogDispatcher:
+    """Пакетная отправка логов в каналы логов.
+
+    Embed копятся в буфере гильдии и отправляются по LOG_BATCH_SIZE штук
+    в одном сообщении раз в LOG_FLUSH_INTERVAL секунд или сразу при
+    заполнении пакета. Порядок внутри гильдии сохраняется. При
+    LOG_USE_WEBHOOKS сообщения идут через закэшированный webhook канала
+    (у него собственный лимит), при отсутствии прав - обычным сообщением.
+
+    send возвращает future, который завершается только после реальной
+    отправки. Временные ошибки и переполнение буфера передаются в future,
+    чтобы повтор и dead_jobs оставались за очередью задач.
+    """
+
+    def __init__(self, bot, use_webhooks: bool = LOG_USE_WEBHOOKS):
+        self.bot = bot
+        self.use_webhooks = use_webhooks
+        self._buffers: Dict[int, Deque[LogEntry]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._webhooks: Dict[int, discord.Webhook] = {}
+        self._no_webhook: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+        # Сильные ссылки на внеочередные отправки: event loop хранит задачи только слабо
+        self._flushes: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Останавливает таймер и отправляет все накопленное."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush_all()
+
+    def send(self, channel: discord.TextChannel, embed: discord.Embed) -> asyncio.Future:
+        """Ставит embed в очередь на отправку в канал логов.
+
+        Возвращает future: True - лог отправлен, False - канал логов
+        недоступен (лог отброшен). При временной ошибке или переполнении
+        буфера future завершается с исключением.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        buffer = self._buffers.setdefault(channel.guild.id, deque())
+        if len(buffer) >= LOG_BUFFER_LIMIT:
+            _, _, dropped = buffer.popleft()
+            print(f"[-] Буфер логов гильдии {channel.guild.id} переполнен, самая старая запись отброшена")
+            if not dropped.done():
+                dropped.set_exception(RuntimeError("Буфер логов переполнен"))
+        buffer.append((channel.id, embed, waiter))
+
+        if len(buffer) >= LOG_BATCH_SIZE:
+            task = asyncio.create_task(self.flush(channel.guild.id))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        return waiter
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            try:
+                await self.flush_all()
+            except Exception as e:
+                print(f"[-] Ошибка пакетной отправки логов: {e}")
+
+    async def flush_all(self) -> None:
+        guild_ids = [guild_id for guild_id, buffer in self._buffers.items() if buffer]
+        await asyncio.gather(*(self.flush(guild_id) for guild_id in guild_ids))
+
+    async def flush(self, guild_id: int) -> None:
+        """Отправляет буфер гильдии пакетами, сохраняя порядок."""
+        lock = self._locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            buffer = self._buffers.get(guild_id)
+            while buffer:
+                # Пакет - подряд идущие записи одного канала
+                channel_id = buffer[0][0]
+                batch: List[LogEntry] = []
+                while buffer and len(batch) < LOG_BATCH_SIZE and buffer[0][0] == channel_id:
+                    batch.append(buffer.popleft())
+
+                try:
+                    delivered = await self._deliver(guild_id, channel_id, [embed for _, embed, _ in batch])
+                except (discord.Forbidden, discord.NotFound) as e:
+                    print(f"[-] Лог отброшен, канал {channel_id} недоступен: {e}")
+                    delivered = False
+                except Exception as e:
+                    # Повтор выполнит очередь задач: пакет не возвращается в буфер
+                    print(f"[-] Ошибка отправки логов ({len(batch)}): {e}")
+                    _resolve(batch, error=e)
+                    continue
+
+                _resolve(batch, result=delivered)
+
+    async def _deliver(self, guild_id: int, channel_id: int, embeds: List[discord.Embed]) -> bool:
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(channel_id) if guild else None
+        if channel is None:
+            return False
+
+        webhook = await self._get_webhook(channel)
+        if webhook is not None:
+            try:
+                await self.bot.rest.background(
+                    webhook.send,
+                    embeds=embeds,
+                    username=self.bot.user.name,
+                    avatar_url=self.bot.user.display_avatar.url
+                )
+                return True
+            except discord.NotFound:
+                # Webhook удалили - отправим обычным сообщением и создадим заново позже
+                self._webhooks.pop(channel_id, None)
+
+        await self.bot.rest.background(channel.send, embeds=embeds)
+        return True
+
+    async def _get_webhook(self, channel: discord.TextChannel) -> Optional[discord.Webhook]:
+        if not self.use_webhooks or channel.id in self._no_webhook:
+            return None
+
+        webhook = self._webhooks.get(channel.id)
+        if webhook is not None:
+            return webhook
+
+        try:
+            for existing in await self.bot.rest.background(channel.webhooks):
+                if existing.user and existing.user.id == self.bot.user.id and existing.name == LOG_WEBHOOK_NAME:
+                    webhook = existing
+                    break
+            else:
+                webhook = await self.bot.rest.background(
+                    channel.create_webhook, name=LOG_WEBHOOK_NAME, reason="Логи заявок"
+                )
+        except discord.HTTPException:
+            # Нет прав на управление webhook - пишем от имени бота
+            self._no_webhook.add(channel.id)
+            return None
+
+        self._webhooks[channel.id] = webhook
+        return webhook
+
+
+def _resolve(batch: List[LogEntry], result: bool = False, error: Optional[BaseException] = None) -> None:
+    """Завершает future записей пакета результатом или ошибкой."""
+    for _, _, waiter in batch:
+        if waiter.done():
+            continue
+        if error is not None:
+            waiter.set_exception(error)
+        else:
+            waiter.set_result(result)
@@ -0,0 +1,145 @@
+import discord
+from typing import Dict, FrozenSet, NamedTuple, Tuple, Union
+
+from models import GuildModerators
+
+
+class ApplicationTemplate(NamedTuple):
+    """Заготовка канала заявки: права доступа без заявителя и строка упоминаний."""
+    overwrites: Dict[Union[discord.Role, discord.Member], discord.PermissionOverwrite]
+    mentions: str
+
+
+# Права модераторов в канале заявки
+MODERATOR_OVERWRITE = discord.PermissionOverwrite(
+    view_channel=True,
+    send_messages=True,
+    read_message_history=True
+)
+
+
+class PermissionResolver:
+    """Кэш прав модераторов заявок.
+
+    Для каждой гильдии хранит frozenset ID ролей и пользователей-модераторов,
+    решение по каждому участнику и итоговый набор участников-модераторов.
+    Кэш сбрасывается событиями бота при изменении ролей, участников или
+    настроек, поэтому проверка прав сводится к поиску в словаре.
+    """
+
+    def __init__(self):
+        self._moderators: Dict[int, GuildModerators] = {}
+        self._decisions: Dict[Tuple[int, int], bool] = {}
+        self._members: Dict[int, FrozenSet[discord.Member]] = {}
+        self._templates: Dict[int, ApplicationTemplate] = {}
+
+    async def get_moderators(self, guild_id: int) -> GuildModerators:
+        """Возвращает роли и пользователей-модераторов гильдии."""
+        moderators = self._moderators.get(guild_id)
+        if moderators is not None:
+            return moderators
+
+        from database import db
+
+        moderators = await db.get_guild_moderators(guild_id)
+        self._moderators[guild_id] = moderators
+        return moderators
+
+    async def is_moderator(self, member: discord.Member) -> bool:
+        """Проверяет, может ли участник модерировать заявки."""
+        key = (member.guild.id, member.id)
+        decision = self._decisions.get(key)
+        if decision is not None:
+            return decision
+
+        moderators = await self.get_moderators(member.guild.id)
+        decision = (
+            member.id in moderators.user_ids
+            or not moderators.role_ids.isdisjoint(role.id for role in member.roles)
+        )
+        self._decisions[key] = decision
+        return decision
+
+    async def moderator_members(self, guild: discord.Guild) -> FrozenSet[discord.Member]:
+        """Возвращает всех участников-модераторов (по ролям и напрямую) без повторов."""
+        members = self._members.get(guild.id)
+        if members is not None:
+            return members
+
+        moderators = await self.get_moderators(guild.id)
+        resolved = set()
+
+        for role_id in moderators.role_ids:
+            role = guild.get_role(role_id)
+            if role:
+                resolved.update(role.members)
+
+        for user_id in moderators.user_ids:
+            member = guild.get_member(user_id)
+            if member:
+                resolved.add(member)
+
+        members = frozenset(resolved)
+        self._members[guild.id] = members
+        return members
+
+    async def application_template(self, guild: discord.Guild) -> ApplicationTemplate:
+        """Возвращает заготовку прав и упоминаний для каналов заявок гильдии.
+
+        Собирается один раз и пересобирается только после смены настроек,
+        ролей или состава модераторов. Словарь прав общий - перед
+        добавлением заявителя его нужно скопировать.
+        """
+        template = self._templates.get(guild.id)
+        if template is not None:
+            return template
+
+        moderators = await self.get_moderators(guild.id)
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            guild.me: discord.PermissionOverwrite(
+                view_channel=True,
+                send_messages=True,
+                manage_channels=True,
+                read_message_history=True
+            )
+        }
+        mentions = []
+
+        # Роли модераторов
+        for role_id in moderators.role_ids:
+            role = guild.get_role(role_id)
+            if role:
+                overwrites[role] = MODERATOR_OVERWRITE
+                mentions.append(role.mention)
+
+        # Пользователи-модераторы
+        for user_id in moderators.user_ids:
+            member = guild.get_member(user_id)
+            if member:
+                overwrites[member] = MODERATOR_OVERWRITE
+            mentions.append(f"<@{user_id}>")
+
+        template = ApplicationTemplate(overwrites=overwrites, mentions=" ".join(mentions))
+        self._templates[guild.id] = template
+        return template
+
+    def invalidate_member(self, guild_id: int, member_id: int) -> None:
+        """Сбрасывает кэш после изменения ролей, входа или выхода участника."""
+        self._decisions.pop((guild_id, member_id), None)
+        self._members.pop(guild_id, None)
+
+        moderators = self._moderators.get(guild_id)
+        if moderators is None or member_id in moderators.user_ids:
+            self._templates.pop(guild_id, None)
+
+    def invalidate_roles(self, guild_id: int) -> None:
+        """Сбрасывает решения гильдии после изменения или удаления роли."""
+        self._decisions = {key: value for key, value in self._decisions.items() if key[0] != guild_id}
+        self._members.pop(guild_id, None)
+        self._templates.pop(guild_id, None)
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        """Полностью сбрасывает кэш гильдии (например, после смены настроек)."""
+        self._moderators.pop(guild_id, None)
+        self.invalidate_roles(guild_id)
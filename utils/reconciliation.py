@@ -0,0 +1,129 @@
+import time
+import discord
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from config import UNPUBLISHED_APPLICATION_TIMEOUT
+from models import Application, GuildSettings
+from utils.rest import Priority
+
+
+class ReconcileReport(NamedTuple):
+    """Итог сверки заявок с каналами Discord."""
+    checked_channels: int
+    checked_threads: int
+    orphaned: int
+    lost_threads: int
+    unpublished: int
+    skipped_guilds: int
+    elapsed_ms: float
+
+
+async def _archived_thread_ids(bot, channel: discord.TextChannel) -> Optional[Set[int]]:
+    """ID архивных приватных веток канала или None, если список получить не удалось."""
+    ids = set()
+    try:
+        async with bot.rest.slot(Priority.BACKGROUND):
+            async for thread in channel.archived_threads(private=True, limit=None):
+                ids.add(thread.id)
+    except discord.HTTPException as e:
+        print(f"[-] Не удалось получить архивные ветки канала {channel.id}: {e}")
+        return None
+    return ids
+
+
+async def reconcile_applications(bot) -> ReconcileReport:
+    """Находит заявки, каналы и ветки которых удалили, пока бот был выключен.
+
+    ID каналов активных заявок и веток участников из базы сравниваются
+    множествами с кэшем каналов и веток гильдий. Запросы к Discord нужны
+    только если чего-то не хватает в кэше: архивные приватные ветки
+    запрашиваются одним списком на канал заявок и канал веток, а не по
+    одной на заявку. Если список получить не удалось, гильдия пропускается.
+    Заявки без канала получают статус 'orphaned', пропавшие ветки участников
+    сбрасываются - всё одной транзакцией. Заявки, которые после сбоя подачи
+    так и не получили канал, получают статус 'failed'.
+    """
+    from database import db
+
+    started = time.perf_counter()
+    rows = await db.get_application_resources(bot.shard_count, bot.shard_ids)
+
+    by_guild: Dict[int, List[Application]] = {}
+    for row in rows:
+        by_guild.setdefault(row.guild_id, []).append(row)
+
+    orphaned = []
+    lost_threads = []
+    checked_channels = checked_threads = skipped = 0
+
+    for guild_id, guild_rows in by_guild.items():
+        guild = bot.get_guild(guild_id)
+        if guild is None or guild.unavailable:
+            skipped += 1
+            continue
+
+        channel_rows = [row for row in guild_rows if row.channel_id and row.is_active]
+        thread_rows = [row for row in guild_rows if row.member_thread_id]
+        checked_channels += len(channel_rows)
+        checked_threads += len(thread_rows)
+
+        known = {channel.id for channel in guild.channels} | {thread.id for thread in guild.threads}
+        missing_channels = {row.channel_id for row in channel_rows} - known
+        missing_threads = {row.member_thread_id for row in thread_rows} - known
+        if not missing_channels and not missing_threads:
+            continue
+
+        guild_settings = await db.get_guild_settings(guild_id) or GuildSettings(guild_id)
+        review_channel = guild.get_channel(guild_settings.review_channel_id or 0)
+        branch_channel = guild.get_channel(guild_settings.branch_channel_id or 0)
+
+        archived: Set[int] = set()
+        complete = True
+        for parent in {review_channel, branch_channel}:
+            if isinstance(parent, discord.TextChannel):
+                ids = await _archived_thread_ids(bot, parent)
+                if ids is None:
+                    complete = False
+                    break
+                archived |= ids
+        if not complete:
+            skipped += 1
+            continue
+
+        missing_channels -= archived
+        orphaned.extend(
+            (row.id, row.channel_id) for row in channel_rows if row.channel_id in missing_channels
+        )
+
+        # Архивные ветки участников ищутся только в канале веток: без него пропажу не подтвердить
+        if isinstance(branch_channel, discord.TextChannel):
+            missing_threads -= archived
+            lost_threads.extend(
+                (row.id, row.member_thread_id) for row in thread_rows if row.member_thread_id in missing_threads
+            )
+
+    marked, cleared = 0, 0
+    if orphaned or lost_threads:
+        marked, cleared = await db.mark_orphaned_applications(orphaned, lost_threads)
+
+    # Общая для всех гильдий таблица: хватит одного процесса
+    unpublished = 0
+    if bot.cluster_id in (None, 0):
+        unpublished = await db.fail_unpublished_applications(UNPUBLISHED_APPLICATION_TIMEOUT)
+
+    report = ReconcileReport(
+        checked_channels=checked_channels,
+        checked_threads=checked_threads,
+        orphaned=marked,
+        lost_threads=cleared,
+        unpublished=unpublished,
+        skipped_guilds=skipped,
+        elapsed_ms=(time.perf_counter() - started) * 1000
+    )
+    print(
+        f"[+] Сверка заявок: проверено каналов {report.checked_channels}, веток {report.checked_threads}; "
+        f"без канала {report.orphaned}, пропавших веток {report.lost_threads}, "
+        f"неразмещенных заявок {report.unpublished}, "
+        f"пропущено гильдий {report.skipped_guilds} за {report.elapsed_ms:.0f} мс"
+    )
+    return report
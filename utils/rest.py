@@ -0,0 +1,135 @@
+import asyncio
+import enum
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from config import REST_CONCURRENCY, REST_BACKGROUND_LIMIT
+
+
+class Priority(enum.IntEnum):
+    """Класс REST-запроса: чем меньше значение, тем раньше он выполняется."""
+    INTERACTIVE = 0  # ответы на взаимодействия и followup
+    CHANNEL = 1  # видимые пользователю действия в каналах
+    BACKGROUND = 2  # логи, личные сообщения, добавление в ветки, очистка
+
+
+class _ClassStats:
+    __slots__ = ('waiting', 'active', 'total', 'wait_total', 'wait_max')
+
+    def __init__(self):
+        self.waiting = 0
+        self.active = 0
+        self.total = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class RestScheduler:
+    """Приоритетный планировщик исходящих REST-запросов.
+
+    Ответы на взаимодействия выполняются сразу, без очереди: у них
+    3 секунды на ответ. Остальные запросы делят REST_CONCURRENCY мест,
+    освободившееся место отдается самому приоритетному ожидающему, а
+    фоновым запросам доступно не больше REST_BACKGROUND_LIMIT мест, чтобы
+    рывок логов или добавлений в ветку не занимал всю пропускную способность.
+    """
+
+    def __init__(self, concurrency: int = REST_CONCURRENCY, background_limit: int = REST_BACKGROUND_LIMIT):
+        self.concurrency = max(1, concurrency)
+        self.background_limit = max(1, min(background_limit, self.concurrency))
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._stats = {priority: _ClassStats() for priority in Priority}
+
+    def _active(self) -> int:
+        return sum(stats.active for stats in self._stats.values())
+
+    def _can_start(self, priority: Priority) -> bool:
+        if priority is Priority.INTERACTIVE:
+            return True
+        if self._active() >= self.concurrency:
+            return False
+        if priority is Priority.BACKGROUND:
+            return self._stats[priority].active < self.background_limit
+        return True
+
+    def _queued_ahead(self, priority: Priority) -> bool:
+        return any(queued <= priority and not waiter.done() for queued, _, waiter in self._waiters)
+
+    def _wake(self) -> None:
+        """Отдает свободные места ожидающим в порядке приоритета."""
+        while self._waiters:
+            priority, _, waiter = self._waiters[0]
+            if waiter.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_start(Priority(priority)):
+                break
+            heapq.heappop(self._waiters)
+            self._stats[priority].active += 1
+            waiter.set_result(None)
+
+    def _release(self, priority: Priority) -> None:
+        self._stats[priority].active -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority):
+        """Занимает место для запроса класса priority на время блока."""
+        stats = self._stats[priority]
+        started = time.perf_counter()
+
+        if self._can_start(priority) and not self._queued_ahead(priority):
+            stats.active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            stats.waiting += 1
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release(priority)  # место выдано, но задача уже отменена
+                raise
+            finally:
+                stats.waiting -= 1
+
+        waited = time.perf_counter() - started
+        stats.total += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    async def call(self, priority: Priority, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Выполняет func(*args, **kwargs) в месте класса priority."""
+        async with self.slot(priority):
+            return await func(*args, **kwargs)
+
+    async def interactive(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        return await self.call(Priority.INTERACTIVE, func, *args, **kwargs)
+
+    async def channel(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        return await self.call(Priority.CHANNEL, func, *args, **kwargs)
+
+    async def background(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        return await self.call(Priority.BACKGROUND, func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Глубина очереди и время ожидания по классам запросов."""
+        return {
+            priority.name.lower(): {
+                'queued': stats.waiting,
+                'active': stats.active,
+                'total': stats.total,
+                'avg_wait_ms': (stats.wait_total / stats.total * 1000) if stats.total else 0.0,
+                'max_wait_ms': stats.wait_max * 1000,
+            }
+            for priority, stats in self._stats.items()
+        }
@@ -1,6 +1,9 @@
 import discord
 from discord import ui
 
+from models import ACTIVE_STATUSES
+from utils.interactions import defer, monitored, respond
+
 
 class ApplicationModal(ui.Modal, title="Подать заявку"):
     """Modal форма для подачи заявки в клан."""
@@ -45,28 +48,57 @@ class ApplicationModal(ui.Modal, title="Подать заявку"):
         super().__init__()
         self.bot = bot
 
+    @monitored()
     async def on_submit(self, interaction: discord.Interaction):
         """Обработка отправки формы."""
-        from database import create_application, get_guild_settings, update_application
-        from utils.embeds import create_application_embed
+        admission = self.bot.admission
+        guild_id, user_id = interaction.guild_id, interaction.user.id
+
+        # Дешевые проверки до любой записи в базу и создания канала
+        refusal = admission.check_rate(guild_id, user_id)
+        if refusal is None and await admission.has_active_application(guild_id, user_id):
+            refusal = "У вас уже есть активная заявка. Дождитесь решения по ней."
+        if refusal is None and not admission.try_enter(guild_id, user_id):
+            refusal = "Сейчас обрабатывается слишком много заявок. Попробуйте через минуту."
+
+        if refusal:
+            await respond(interaction, refusal, ephemeral=True)
+            return
 
-        await interaction.response.defer(ephemeral=True)
+        try:
+            await self.submit(interaction)
+        finally:
+            admission.leave(guild_id, user_id)
 
-        guild_settings = get_guild_settings(interaction.guild_id)
+    async def submit(self, interaction: discord.Interaction):
+        """Создание заявки после прохождения проверок допуска."""
+        from database import db
+        from utils.embeds import create_application_embed
 
-        if not guild_settings:
-            return
+        await defer(interaction, ephemeral=True)
 
-        category_id = guild_settings.get('applications_category_id')
-        if not category_id:
-            return
+        guild_settings = await db.get_guild_settings(interaction.guild_id)
 
-        category = interaction.guild.get_channel(category_id)
-        if not category:
+        # Заявка создается либо отдельным каналом в категории, либо приватной веткой
+        thread_mode = guild_settings.thread_mode if guild_settings else False
+        if not guild_settings:
+            parent_id = None
+        elif thread_mode:
+            parent_id = guild_settings.review_channel_id
+        else:
+            parent_id = guild_settings.applications_category_id
+        parent = interaction.guild.get_channel(parent_id) if parent_id else None
+        if not parent:
+            # Без этого заявитель не получил бы никакого ответа
+            await respond(
+                interaction,
+                "Подача заявок сейчас не настроена. Сообщите администрации сервера.",
+                ephemeral=True
+            )
             return
 
         # Создаем заявку в базе данных
-        application_id = create_application(
+        application_id = await db.create_application(
             guild_id=interaction.guild_id,
             user_id=interaction.user.id,
             username=interaction.user.name,
@@ -76,93 +108,138 @@ class ApplicationModal(ui.Modal, title="Подать заявку"):
             ready_online=self.ready_online.value,
             how_found=self.how_found.value or None
         )
+        self.bot.admission.set_active(interaction.guild_id, interaction.user.id, True)
 
-        # Получаем роли и пользователей модераторов
-        moderator_roles = guild_settings.get('moderator_roles', [])
-        moderator_users = guild_settings.get('moderator_users', [])
-
-        # Создаем приватный канал
-        overwrites = {
-            interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            interaction.user: discord.PermissionOverwrite(
-                view_channel=True,
-                send_messages=True,
-                read_message_history=True
-            ),
-            interaction.guild.me: discord.PermissionOverwrite(
-                view_channel=True,
-                send_messages=True,
-                manage_channels=True,
-                read_message_history=True
+        # Заготовка прав и упоминаний модераторов (кэшируется по гильдии)
+        template = None
+        channel = None
+        published = False
+        try:
+            template = await self.bot.permissions.application_template(interaction.guild)
+
+            if thread_mode:
+                channel = await self.create_thread(interaction, parent)
+            else:
+                channel = await self.create_channel(interaction, parent, template)
+
+            if channel is None:
+                return
+
+            # Создаем embed с заявкой
+            embed = create_application_embed(
+                user=interaction.user,
+                static=self.static.value,
+                hours_per_day=self.hours_per_day.value,
+                age_oos=self.age_oos.value,
+                ready_online=self.ready_online.value,
+                how_found=self.how_found.value or None,
+                application_id=application_id
             )
-        }
-
-        # Добавляем роли модераторов
-        for role_id in moderator_roles:
-            role = interaction.guild.get_role(role_id)
-            if role:
-                overwrites[role] = discord.PermissionOverwrite(
-                    view_channel=True,
-                    send_messages=True,
-                    read_message_history=True
-                )
-
-        # Добавляем пользователей-модераторов
-        for user_id in moderator_users:
-            member = interaction.guild.get_member(user_id)
-            if member:
-                overwrites[member] = discord.PermissionOverwrite(
-                    view_channel=True,
-                    send_messages=True,
-                    read_message_history=True
-                )
 
-        try:
-            channel = await interaction.guild.create_text_channel(
-                name=f"заявка-{interaction.user.name}",
-                category=category,
-                overwrites=overwrites,
-                reason=f"Заявка от {interaction.user.name}"
+            # Импортируем view для кнопок
+            from views.moderation_buttons import ModerationView
+
+            # Отправляем сообщение с заявкой
+            view = ModerationView(application_id)
+            message = await self.bot.rest.channel(
+                channel.send,
+                content=f"{interaction.user.mention}",
+                embed=embed,
+                view=view
             )
-        except:
-            return
 
-        # Создаем embed с заявкой
-        embed = create_application_embed(
-            user=interaction.user,
-            static=self.static.value,
-            hours_per_day=self.hours_per_day.value,
-            age_oos=self.age_oos.value,
-            ready_online=self.ready_online.value,
-            how_found=self.how_found.value or None,
-            application_id=application_id
-        )
+            # Обновляем ID сообщения и канала в базе
+            await db.update_application(application_id, message_id=message.id, channel_id=channel.id)
+            published = True
+        finally:
+            # Без канала и сообщения заявка навсегда осталась бы активной и закрыла бы подачу новой
+            if not published:
+                await self.abandon(interaction, application_id, channel)
+
+        # Отправляем пинг модераторам
+        if template.mentions:
+            await self.bot.rest.channel(channel.send, template.mentions)
+
+    async def abandon(self, interaction: discord.Interaction, application_id: int, channel):
+        """Закрывает заявку, которую не удалось разместить, чтобы заявитель мог подать новую."""
+        from database import db
 
-        # Импортируем view для кнопок
-        from views.moderation_buttons import ModerationView
+        jobs = []
+        if channel is not None:
+            jobs.append(('delete_application_channel', {
+                'channel_id': channel.id,
+                'reason': "Не удалось создать заявку"
+            }))
 
-        # Отправляем сообщение с заявкой
-        view = ModerationView(self.bot, application_id)
-        message = await channel.send(
-            content=f"{interaction.user.mention}",
-            embed=embed,
-            view=view
+        try:
+            await self.bot.jobs.record_decision(
+                application_id,
+                interaction.guild_id,
+                jobs,
+                expected_status=ACTIVE_STATUSES,
+                status='failed'
+            )
+        except Exception as e:
+            print(f"[-] Ошибка закрытия неразмещенной заявки {application_id}: {e}")
+        self.bot.admission.set_active(interaction.guild_id, interaction.user.id, False)
+
+        try:
+            await respond(interaction, "Не удалось создать заявку. Попробуйте позже.", ephemeral=True)
+        except discord.HTTPException:
+            pass
+
+    async def create_channel(self, interaction: discord.Interaction, category, template):
+        """Создает приватный текстовый канал заявки в категории."""
+        # Копируем заготовку гильдии и добавляем только заявителя
+        overwrites = dict(template.overwrites)
+        overwrites[interaction.user] = discord.PermissionOverwrite(
+            view_channel=True,
+            send_messages=True,
+            read_message_history=True
         )
 
-        # Обновляем ID сообщения и канала в базе
-        update_application(application_id, message_id=message.id, channel_id=channel.id)
+        name = f"заявка-{interaction.user.name}"
+        reason = f"Заявка от {interaction.user.name}"
+
+        # Сначала пробуем взять заранее созданный канал из пула
+        try:
+            channel = await self.bot.channel_pool.claim(interaction.guild, category, name, overwrites, reason)
+        except Exception as e:
+            print(f"[-] Ошибка получения канала из пула: {e}")
+            channel = None
+        if channel:
+            return channel
 
-        # Формируем список упоминаний
-        mentions = []
+        try:
+            return await self.bot.rest.channel(
+                interaction.guild.create_text_channel,
+                name=name,
+                category=category,
+                overwrites=overwrites,
+                reason=reason
+            )
+        except:
+            return None
 
-        for role_id in moderator_roles:
-            role = interaction.guild.get_role(role_id)
-            if role:
-                mentions.append(role.mention)
+    async def create_thread(self, interaction: discord.Interaction, review_channel):
+        """Создает приватную ветку заявки в канале заявок.
 
-        for user_id in moderator_users:
-            mentions.append(f"<@{user_id}>")
+        Ветки не упираются в лимит каналов сервера и категории. Модераторы
+        добавляются в ветку фоновой задачей, чтобы не задерживать заявителя.
+        """
+        try:
+            thread = await self.bot.rest.channel(
+                review_channel.create_thread,
+                name=f"заявка-{interaction.user.name}",
+                type=discord.ChannelType.private_thread,
+                invitable=False,
+                reason=f"Заявка от {interaction.user.name}"
+            )
+            await self.bot.rest.channel(thread.add_user, interaction.user)
+        except:
+            return None
 
-        # Отправляем пинг модераторам
-        if mentions:
-            await channel.send(" ".join(mentions))
+        await self.bot.jobs.enqueue(interaction.guild_id, [
+            ('add_thread_moderators', {'thread_id': thread.id})
+        ])
+        return thread
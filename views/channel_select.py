@@ -2,8 +2,7 @@ import discord
 from discord import ui
 from datetime import datetime
 
-# Ярко-зеленый цвет для всех DM сообщений
-BRIGHT_GREEN = 0x00FF00
+from utils.interactions import defer, monitored
 
 
 class VoiceChannelSelect(ui.View):
@@ -23,11 +22,12 @@ class VoiceChannelSelect(ui.View):
         min_values=1,
         max_values=1
     )
+    @monitored()
     async def select_channel(self, interaction: discord.Interaction, select: ui.ChannelSelect):
         """Обработка выбора голосового канала."""
-        from database import get_guild_settings
+        from database import db
 
-        await interaction.response.defer(ephemeral=True)
+        await defer(interaction, ephemeral=True)
 
         voice_channel = select.values[0]
         applicant = interaction.guild.get_member(self.applicant_id)
@@ -35,43 +35,28 @@ class VoiceChannelSelect(ui.View):
         if not applicant:
             return
 
-        guild_settings = get_guild_settings(interaction.guild_id)
-        clan_name = guild_settings.get('clan_name', 'Клан') if guild_settings else 'Клан'
+        guild_settings = await db.get_guild_settings(interaction.guild_id)
+        clan_name = guild_settings.clan_name if guild_settings else 'Клан'
 
-        if self.channel:
-            await self.channel.send(
-                f"{interaction.user.mention} вызвал на обзвон {applicant.mention}\n"
-                f"Зайдите в голосовой канал {voice_channel.mention}"
-            )
-
-        try:
-            embed = discord.Embed(
-                title="Приглашение на обзвон",
-                description="Вы были вызваны на **обзвон**!",
-                color=BRIGHT_GREEN
-            )
-
-            embed.add_field(
-                name="",
-                value=f"Вас приглашают присоединиться к голосовому каналу: **{clan_name}**\n{voice_channel.mention}",
-                inline=False
-            )
+        jobs = []
 
-            embed.add_field(
-                name="ID Дискорд сервера:",
-                value=str(interaction.guild_id),
-                inline=False
-            )
-
-            embed.add_field(
-                name="Дата события:",
-                value=f"<t:{int(datetime.now().timestamp())}:R>",
-                inline=False
-            )
-
-            await applicant.send(embed=embed)
-        except discord.Forbidden:
-            pass
+        if self.channel:
+            jobs.append(('call_notice', {
+                'channel_id': self.channel.id,
+                'moderator_id': interaction.user.id,
+                'user_id': applicant.id,
+                'voice_channel_id': voice_channel.id
+            }))
+
+        jobs.append(('notify_applicant', {
+            'user_id': applicant.id,
+            'event': 'call',
+            'clan_name': clan_name,
+            'timestamp': int(datetime.now().timestamp()),
+            'voice_channel_id': voice_channel.id
+        }))
+
+        await self.bot.jobs.enqueue(interaction.guild_id, jobs)
 
         self.stop()
 
@@ -1,9 +1,45 @@
+import asyncio
 import discord
+from contextlib import asynccontextmanager
 from discord import ui
 from datetime import datetime
+from typing import Dict, Tuple
 
-# Ярко-зеленый цвет для всех DM сообщений
-BRIGHT_GREEN = 0x00FF00
+from models import ACTIVE_STATUSES
+from utils.interactions import defer, monitored, respond, send_modal
+
+
+ALREADY_DECIDED = "По этой заявке уже принято решение."
+IN_PROGRESS = "Эту заявку сейчас обрабатывает другой модератор."
+
+
+class ApplicationLocks:
+    """Реестр блокировок заявок, по которым выполняется действие модератора.
+
+    Блокировка не ждет: второй одновременный клик по той же заявке сразу
+    получает отказ и не делает ни одного запроса к API. Окончательную
+    защиту дает compare-and-set статуса в базе.
+    """
+
+    def __init__(self):
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def hold(self, application_id: int):
+        """Захватывает заявку; внутри блока True, если захват удался."""
+        lock = self._locks.setdefault(application_id, asyncio.Lock())
+        if lock.locked():
+            yield False
+            return
+
+        async with lock:
+            try:
+                yield True
+            finally:
+                self._locks.pop(application_id, None)
+
+
+application_locks = ApplicationLocks()
 
 
 class RejectReasonModal(ui.Modal, title="Причина отклонения"):
@@ -22,320 +58,332 @@ class RejectReasonModal(ui.Modal, title="Причина отклонения"):
         self.bot = bot
         self.application_id = application_id
 
+    @monitored()
     async def on_submit(self, interaction: discord.Interaction):
         """Обработка отклонения заявки."""
-        from database import get_application, update_application, get_guild_settings
+        async with application_locks.hold(self.application_id) as acquired:
+            if not acquired:
+                await respond(interaction, IN_PROGRESS, ephemeral=True)
+                return
+            await self.reject(interaction)
+
+    async def reject(self, interaction: discord.Interaction):
+        from database import db
 
-        await interaction.response.defer(ephemeral=True)
+        await defer(interaction, ephemeral=True)
 
-        application = get_application(self.application_id)
+        application = await db.get_application(self.application_id)
         if not application:
             return
+        if not application.is_active:
+            await respond(interaction, ALREADY_DECIDED, ephemeral=True)
+            return
 
-        guild_settings = get_guild_settings(interaction.guild_id)
+        guild_settings = await db.get_guild_settings(interaction.guild_id)
         if not guild_settings:
             return
 
-        applicant = interaction.guild.get_member(application['user_id'])
-
-        update_application(self.application_id, status='rejected', moderator_id=interaction.user.id)
+        reason = self.reason.value if self.reason.value else None
+        jobs = []
 
-        channel_id = application.get('channel_id')
+        channel_id = application.channel_id
         if channel_id:
-            channel = interaction.guild.get_channel(channel_id)
-            if channel:
-                try:
-                    await channel.delete(reason="Заявка отклонена")
-                except:
-                    pass
-
-        clan_name = guild_settings.get('clan_name', 'Клан')
-        if applicant:
-            try:
-                embed = discord.Embed(
-                    title="Отклонение заявки",
-                    description=f"Ваша заявка в {clan_name} **отклонена**!",
-                    color=BRIGHT_GREEN
-                )
-
-                if self.reason.value:
-                    embed.add_field(
-                        name="Причина:",
-                        value=self.reason.value,
-                        inline=False
-                    )
-
-                embed.add_field(
-                    name="ID Дискорд сервера:",
-                    value=str(interaction.guild_id),
-                    inline=False
-                )
-
-                embed.add_field(
-                    name="Дата отклонения:",
-                    value=f"<t:{int(datetime.now().timestamp())}:R>",
-                    inline=False
-                )
-
-                await applicant.send(embed=embed)
-            except discord.Forbidden:
-                pass
-
-        # Отправляем лог об отклонении
-        from utils.embeds import send_log
-        await send_log(
-            guild=interaction.guild,
-            application=application,
-            moderator=interaction.user,
-            applicant=applicant,
-            action='rejected',
-            reason=self.reason.value if self.reason.value else None
+            jobs.append(('delete_application_channel', {
+                'channel_id': channel_id,
+                'reason': "Заявка отклонена"
+            }))
+
+        jobs.append(('notify_applicant', {
+            'user_id': application.user_id,
+            'event': 'rejected',
+            'clan_name': guild_settings.clan_name,
+            'timestamp': int(datetime.now().timestamp()),
+            'reason': reason
+        }))
+
+        # Лог об отклонении
+        jobs.append(('send_application_log', {
+            'application_id': self.application_id,
+            'moderator_id': interaction.user.id,
+            'action': 'rejected',
+            'reason': reason
+        }))
+
+        recorded = await self.bot.jobs.record_decision(
+            self.application_id,
+            interaction.guild_id,
+            jobs,
+            expected_status=ACTIVE_STATUSES,
+            status='rejected',
+            moderator_id=interaction.user.id
         )
+        if not recorded:
+            await respond(interaction, ALREADY_DECIDED, ephemeral=True)
+            return
+        self.bot.admission.set_active(interaction.guild_id, application.user_id, False)
 
 
-class ModerationView(ui.View):
-    """View с кнопками модерации заявки."""
+# Действие -> (текст кнопки, стиль). Порядок определяет порядок кнопок в сообщении.
+MODERATION_ACTIONS: Dict[str, Tuple[str, discord.ButtonStyle]] = {
+    'accept': ("Принять", discord.ButtonStyle.success),
+    'review': ("Взять на рассмотрение", discord.ButtonStyle.primary),
+    'call': ("Вызвать на обзвон", discord.ButtonStyle.secondary),
+    'reject': ("Отклонить", discord.ButtonStyle.danger),
+}
 
-    def __init__(self, bot, application_id: int):
-        super().__init__(timeout=None)
-        self.bot = bot
-        self.application_id = application_id
 
-    async def check_permissions(self, interaction: discord.Interaction) -> bool:
-        """Проверяет права пользователя на использование кнопок."""
-        from database import get_guild_settings
+class ModerationButton(ui.DynamicItem[ui.Button], template=r'application:(?P<action>accept|review|call|reject):(?P<id>[0-9]+)'):
+    """Кнопка модерации, ID заявки закодирован в custom_id.
 
-        guild_settings = get_guild_settings(interaction.guild_id)
-        if not guild_settings:
-            return False
+    Класс регистрируется один раз через bot.add_dynamic_items и обслуживает
+    кнопки всех заявок, поэтому при запуске не нужно восстанавливать View
+    для каждой активной заявки.
+    """
 
-        moderator_roles = guild_settings.get('moderator_roles', [])
-        moderator_users = guild_settings.get('moderator_users', [])
+    def __init__(self, action: str, application_id: int):
+        label, style = MODERATION_ACTIONS[action]
+        super().__init__(
+            ui.Button(
+                label=label,
+                style=style,
+                custom_id=f"application:{action}:{application_id}"
+            )
+        )
+        self.action = action
+        self.application_id = application_id
 
-        if interaction.user.id in moderator_users:
-            return True
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(match['action'], int(match['id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        # Отклонение открывает модальное окно, его нельзя отложить через defer
+        await interaction.client.interactions.run(
+            f"ModerationButton.{self.action}",
+            interaction,
+            lambda: self.handle(interaction),
+            auto_defer=self.action != 'reject'
+        )
+
+    async def handle(self, interaction: discord.Interaction):
+        """Вызывает обработчик действия; решения по заявке - под блокировкой заявки."""
+        handler = getattr(self, f"{self.action}_button")
+        if self.action not in ('accept', 'review'):
+            await handler(interaction)
+            return
 
-        user_role_ids = [role.id for role in interaction.user.roles]
-        return any(role_id in user_role_ids for role_id in moderator_roles)
+        async with application_locks.hold(self.application_id) as acquired:
+            if not acquired:
+                await respond(interaction, IN_PROGRESS, ephemeral=True)
+                return
+            await handler(interaction)
 
-    @ui.button(label="Принять", style=discord.ButtonStyle.success, custom_id="accept_application")
-    async def accept_button(self, interaction: discord.Interaction, button: ui.Button):
+    async def check_permissions(self, interaction: discord.Interaction) -> bool:
+        """Проверяет права пользователя на использование кнопок."""
+        return await interaction.client.permissions.is_moderator(interaction.user)
+
+    async def accept_button(self, interaction: discord.Interaction):
         """Принять заявку."""
         if not await self.check_permissions(interaction):
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "У вас нет прав для выполнения этого действия.",
                 ephemeral=True
             )
             return
 
-        await interaction.response.defer()
+        await defer(interaction)
 
-        from database import get_application, update_application, get_guild_settings
+        from database import db
 
-        application = get_application(self.application_id)
+        application = await db.get_application(self.application_id)
         if not application:
             return
+        if not application.is_active:
+            await respond(interaction, ALREADY_DECIDED, ephemeral=True)
+            return
 
-        guild_settings = get_guild_settings(interaction.guild_id)
+        guild_settings = await db.get_guild_settings(interaction.guild_id)
         if not guild_settings:
             return
 
-        applicant = interaction.guild.get_member(application['user_id'])
+        applicant = interaction.guild.get_member(application.user_id)
         if not applicant:
             return
 
-        member_role_id = guild_settings.get('member_role_id')
-        if member_role_id:
-            member_role = interaction.guild.get_role(member_role_id)
-            if member_role:
-                try:
-                    await applicant.add_roles(member_role)
-                except discord.Forbidden:
-                    pass
+        # Решение фиксируется сразу, остальное выполняют фоновые задачи
+        jobs = []
 
-        update_application(self.application_id, status='accepted', moderator_id=interaction.user.id)
+        member_role_id = guild_settings.member_role_id
+        if member_role_id:
+            jobs.append(('add_member_role', {
+                'user_id': applicant.id,
+                'role_id': member_role_id
+            }))
 
-        channel_id = application.get('channel_id')
+        channel_id = application.channel_id
         if channel_id:
-            channel = interaction.guild.get_channel(channel_id)
-            if channel:
-                try:
-                    await channel.delete(reason="Заявка принята")
-                except:
-                    pass
-
-        branch_channel_id = guild_settings.get('branch_channel_id')
+            jobs.append(('delete_application_channel', {
+                'channel_id': channel_id,
+                'reason': "Заявка принята"
+            }))
 
+        branch_channel_id = guild_settings.branch_channel_id
         if branch_channel_id:
-            branch_channel = interaction.guild.get_channel(branch_channel_id)
-            if branch_channel:
-                try:
-                    moderator_roles = guild_settings.get('moderator_roles', [])
-                    moderator_users = guild_settings.get('moderator_users', [])
-
-                    thread = await branch_channel.create_thread(
-                        name=f"{applicant.name}",
-                        type=discord.ChannelType.private_thread,
-                        reason=f"Ветка для принятого участника {applicant.name}"
-                    )
-
-                    await thread.add_user(applicant)
-
-                    for role_id in moderator_roles:
-                        role = interaction.guild.get_role(role_id)
-                        if role:
-                            for member in role.members:
-                                try:
-                                    await thread.add_user(member)
-                                except:
-                                    pass
-
-                    for user_id in moderator_users:
-                        member = interaction.guild.get_member(user_id)
-                        if member:
-                            try:
-                                await thread.add_user(member)
-                            except:
-                                pass
-
-                    await thread.send(f"Добро пожаловать, {applicant.mention}! Ваша заявка была принята.")
-
-                    update_application(self.application_id, member_thread_id=thread.id)
-
-                except Exception as e:
-                    print(f"Ошибка создания ветки: {e}")
-
-        clan_name = guild_settings.get('clan_name', 'Клан')
-        try:
-            embed = discord.Embed(
-                title="Принятие заявки.",
-                description=f"Ваша заявка в {clan_name} **принята**!",
-                color=BRIGHT_GREEN
-            )
-
-            embed.add_field(
-                name="ID Дискорд сервера:",
-                value=str(interaction.guild_id),
-                inline=False
-            )
-
-            embed.add_field(
-                name="Дата принятия:",
-                value=f"<t:{int(datetime.now().timestamp())}:R>",
-                inline=False
-            )
-
-            await applicant.send(embed=embed)
-        except discord.Forbidden:
-            pass
-
-        # Отправляем лог о принятии
-        from utils.embeds import send_log
-        await send_log(
-            guild=interaction.guild,
-            application=application,
-            moderator=interaction.user,
-            applicant=applicant,
-            action='accepted'
+            jobs.append(('create_member_thread', {
+                'application_id': self.application_id,
+                'user_id': applicant.id,
+                'branch_channel_id': branch_channel_id
+            }))
+
+        jobs.append(('notify_applicant', {
+            'user_id': applicant.id,
+            'event': 'accepted',
+            'clan_name': guild_settings.clan_name,
+            'timestamp': int(datetime.now().timestamp())
+        }))
+
+        # Лог о принятии
+        jobs.append(('send_application_log', {
+            'application_id': self.application_id,
+            'moderator_id': interaction.user.id,
+            'action': 'accepted'
+        }))
+
+        recorded = await interaction.client.jobs.record_decision(
+            self.application_id,
+            interaction.guild_id,
+            jobs,
+            expected_status=ACTIVE_STATUSES,
+            status='accepted',
+            moderator_id=interaction.user.id
         )
+        if not recorded:
+            await respond(interaction, ALREADY_DECIDED, ephemeral=True)
+            return
+        interaction.client.admission.set_active(interaction.guild_id, applicant.id, False)
 
-    @ui.button(label="Взять на рассмотрение", style=discord.ButtonStyle.primary, custom_id="review_application")
-    async def review_button(self, interaction: discord.Interaction, button: ui.Button):
+    async def review_button(self, interaction: discord.Interaction):
         """Взять заявку на рассмотрение."""
         if not await self.check_permissions(interaction):
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "У вас нет прав для выполнения этого действия.",
                 ephemeral=True
             )
             return
 
-        from database import get_application, update_application, get_guild_settings
+        from database import db
 
-        application = get_application(self.application_id)
+        application = await db.get_application(self.application_id)
         if not application:
-            await interaction.response.defer()
+            await defer(interaction)
+            return
+        if application.status != 'pending':
+            await respond(interaction, "Заявка уже на рассмотрении или по ней принято решение.", ephemeral=True)
             return
 
-        guild_settings = get_guild_settings(interaction.guild_id)
-        clan_name = guild_settings.get('clan_name', 'Клан') if guild_settings else 'Клан'
+        guild_settings = await db.get_guild_settings(interaction.guild_id)
+        clan_name = guild_settings.clan_name if guild_settings else 'Клан'
 
-        applicant = interaction.guild.get_member(application['user_id'])
+        applicant = interaction.guild.get_member(application.user_id)
         if not applicant:
-            await interaction.response.defer()
+            await defer(interaction)
             return
 
-        update_application(self.application_id, status='reviewing', moderator_id=interaction.user.id)
+        recorded = await interaction.client.jobs.record_decision(
+            self.application_id,
+            interaction.guild_id,
+            [('notify_applicant', {
+                'user_id': applicant.id,
+                'event': 'reviewing',
+                'clan_name': clan_name,
+                'timestamp': int(datetime.now().timestamp()),
+                'jump_url': interaction.message.jump_url
+            })],
+            expected_status=('pending',),
+            status='reviewing',
+            moderator_id=interaction.user.id
+        )
+        if not recorded:
+            await respond(interaction, "Заявка уже на рассмотрении или по ней принято решение.", ephemeral=True)
+            return
 
-        await interaction.response.send_message(
+        await respond(
+            interaction,
             f"Заявка взята на **рассмотрение** модератором {interaction.user.mention}"
         )
 
-        try:
-            embed = discord.Embed(
-                title="Рассмотрение заявки.",
-                description=f"Ваша заявка в {clan_name} **взята на рассмотрение**!",
-                color=BRIGHT_GREEN
-            )
-
-            embed.add_field(
-                name="Ссылка на заявку:",
-                value=f"[{clan_name}]({interaction.message.jump_url})",
-                inline=False
-            )
-
-            embed.add_field(
-                name="ID Дискорд сервера:",
-                value=str(interaction.guild_id),
-                inline=False
-            )
-
-            embed.add_field(
-                name="Дата события:",
-                value=f"<t:{int(datetime.now().timestamp())}:R>",
-                inline=False
-            )
-
-            await applicant.send(embed=embed)
-        except discord.Forbidden:
-            pass
-
-    @ui.button(label="Вызвать на обзвон", style=discord.ButtonStyle.secondary, custom_id="call_application")
-    async def call_button(self, interaction: discord.Interaction, button: ui.Button):
+    async def call_button(self, interaction: discord.Interaction):
         """Вызвать на обзвон."""
         if not await self.check_permissions(interaction):
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "У вас нет прав для выполнения этого действия.",
                 ephemeral=True
             )
             return
 
-        from database import get_application
+        from database import db
         from views.channel_select import VoiceChannelSelect
 
-        application = get_application(self.application_id)
+        application = await db.get_application(self.application_id)
         if not application:
-            await interaction.response.defer()
+            await defer(interaction)
             return
 
-        view = VoiceChannelSelect(self.bot, self.application_id, application['user_id'], interaction.channel)
-        await interaction.response.send_message(
+        view = VoiceChannelSelect(interaction.client, self.application_id, application.user_id, interaction.channel)
+        await respond(
+            interaction,
             "Выберите голосовой канал для обзвона:",
             view=view,
             ephemeral=True
         )
 
-    @ui.button(label="Отклонить", style=discord.ButtonStyle.danger, custom_id="reject_application")
-    async def reject_button(self, interaction: discord.Interaction, button: ui.Button):
+    async def reject_button(self, interaction: discord.Interaction):
         """Отклонить заявку - открывает модальное окно для причины."""
         if not await self.check_permissions(interaction):
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "У вас нет прав для выполнения этого действия.",
                 ephemeral=True
             )
             return
 
-        modal = RejectReasonModal(self.bot, self.application_id)
-        await interaction.response.send_modal(modal)
+        modal = RejectReasonModal(interaction.client, self.application_id)
+        await send_modal(interaction, modal)
+
+
+class LegacyModerationButton(ui.DynamicItem[ui.Button], template=r'(?P<action>accept|review|call|reject)_application'):
+    """Кнопки старых сообщений со статическим custom_id.
+
+    ID заявки в них не закодирован, поэтому заявка находится по ID сообщения.
+    """
+
+    def __init__(self, item: ui.Button):
+        super().__init__(item)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        from database import db
+
+        application = await db.get_application_by_message(interaction.message.id)
+        if not application:
+            return cls(item)
+        return ModerationButton(match['action'], application.id)
+
+    @monitored()
+    async def callback(self, interaction: discord.Interaction):
+        await respond(interaction, "Заявка не найдена.", ephemeral=True)
+
+
+class ModerationView(ui.View):
+    """View с кнопками модерации заявки."""
+
+    def __init__(self, application_id: int):
+        super().__init__(timeout=None)
+        for action in MODERATION_ACTIONS:
+            self.add_item(ModerationButton(action, application_id))
 
 
 class ApplicationPanelView(ui.View):
@@ -346,9 +394,18 @@ class ApplicationPanelView(ui.View):
         self.bot = bot
 
     @ui.button(label="Подать заявку", style=discord.ButtonStyle.success, custom_id="submit_application")
+    @monitored(auto_defer=False)
     async def submit_button(self, interaction: discord.Interaction, button: ui.Button):
         """Открыть форму подачи заявки."""
         from views.application_modal import ApplicationModal
 
+        if await self.bot.admission.has_active_application(interaction.guild_id, interaction.user.id):
+            await respond(
+                interaction,
+                "У вас уже есть активная заявка. Дождитесь решения по ней.",
+                ephemeral=True
+            )
+            return
+
         modal = ApplicationModal(self.bot)
-        await interaction.response.send_modal(modal)
+        await send_modal(interaction, modal)
@@ -1,6 +1,8 @@
 import discord
 from discord import ui
 
+from utils.interactions import monitored, respond
+
 
 class WelcomeView(ui.View):
     """View с кнопкой получения роли в прихожей."""
@@ -10,22 +12,25 @@ class WelcomeView(ui.View):
         self.bot = bot
 
     @ui.button(label="Нажми для получения роли", style=discord.ButtonStyle.success, custom_id="get_welcome_role")
+    @monitored()
     async def get_role_button(self, interaction: discord.Interaction, button: ui.Button):
         """Выдает роль пользователю."""
-        from database import get_guild_settings
+        from database import db
 
-        guild_settings = get_guild_settings(interaction.guild_id)
+        guild_settings = await db.get_guild_settings(interaction.guild_id)
 
         if not guild_settings:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "Бот не настроен. Обратитесь к администратору.",
                 ephemeral=True
             )
             return
 
-        welcome_role_id = guild_settings.get('welcome_role_id')
+        welcome_role_id = guild_settings.welcome_role_id
         if not welcome_role_id:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "Роль не настроена. Обратитесь к администратору.",
                 ephemeral=True
             )
@@ -33,21 +38,23 @@ class WelcomeView(ui.View):
 
         role = interaction.guild.get_role(welcome_role_id)
         if not role:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "Роль не найдена. Обратитесь к администратору.",
                 ephemeral=True
             )
             return
 
         if role in interaction.user.roles:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "У вас уже есть эта роль!",
                 ephemeral=True
             )
             return
 
         try:
-            await interaction.user.add_roles(role, reason="Получение роли через панель")
+            await self.bot.rest.channel(interaction.user.add_roles, role, reason="Получение роли через панель")
 
             embed = discord.Embed(
                 title="Управление ролями",
@@ -66,15 +73,17 @@ class WelcomeView(ui.View):
                 inline=False
             )
 
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await respond(interaction, embed=embed, ephemeral=True)
 
         except discord.Forbidden:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 "Не удалось выдать роль. Проверьте права бота.",
                 ephemeral=True
             )
         except Exception as e:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 f"Произошла ошибка: {e}",
                 ephemeral=True
             )